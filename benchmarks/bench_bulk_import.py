@@ -0,0 +1,93 @@
+"""Measure DB.add_sessions_bulk and DB.import_sessions throughput.
+
+Imports --rows synthetic sessions spread over --years into a fresh study
+database, once from an in-memory list and once from a CSV written in
+the exporter's CSV format, then appends 1% more rows to
+the populated database (the staged path that keeps the indexes). Reports
+rows/sec against the 200k rows/sec target and checks that subject totals
+match the inserted rows.
+
+The append is small, so its rate mostly reflects fixed costs rather than
+per-row work: rows dated all over the history touch most pages of both
+session indexes, and the WAL checkpoint that follows the commit writes
+them back.
+
+Usage: python benchmarks/bench_bulk_import.py [--rows 500000] [--subjects 50] [--years 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DB  # noqa: E402
+
+TARGET_ROWS_PER_SEC = 200_000
+
+
+def synthetic_sessions(rows, subjects, years, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2020, 3, 21)
+    span = int(years * 365 * 86400)
+    for _ in range(rows):
+        ts = start + timedelta(seconds=rng.randrange(span))
+        yield f"Subject {rng.randrange(subjects)}", round(rng.uniform(5, 60), 2), ts
+
+
+def check_totals(db, expected_minutes):
+    total = sum(s[3] for s in db.list_subjects())
+    assert abs(total - expected_minutes) < 1e-3 * max(1, expected_minutes), (total, expected_minutes)
+
+
+def report(label, rows, seconds):
+    rate = rows / seconds
+    verdict = "ok" if rate >= TARGET_ROWS_PER_SEC else "below target"
+    print(f"{label:<12}{rows:>10}{seconds:>10.2f}{rate:>14,.0f}  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--subjects", type=int, default=50)
+    parser.add_argument("--years", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = sum(m for _, m, _ in synthetic_sessions(args.rows, args.subjects, args.years))
+        print(f"{'source':<12}{'rows':>10}{'seconds':>10}{'rows/sec':>14}")
+
+        rows = list(synthetic_sessions(args.rows, args.subjects, args.years))
+        db = DB(os.path.join(tmp, "memory.db"))
+        start = time.perf_counter()
+        count = db.add_sessions_bulk(rows)
+        report("memory", count, time.perf_counter() - start)
+        check_totals(db, expected)
+        db.close()
+        del rows
+
+        csv_path = os.path.join(tmp, "sessions.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("subject,minutes,ts\n")
+            for subject, minutes, ts in synthetic_sessions(args.rows, args.subjects, args.years):
+                f.write(f"{subject},{minutes},{ts.isoformat()}\n")
+        db = DB(os.path.join(tmp, "csv.db"))
+        start = time.perf_counter()
+        count = db.import_sessions(csv_path)
+        report("csv", count, time.perf_counter() - start)
+        check_totals(db, expected)
+
+        extra = list(synthetic_sessions(max(1, args.rows // 100), args.subjects, args.years, seed=2))
+        start = time.perf_counter()
+        count = db.add_sessions_bulk(extra)
+        report("append", count, time.perf_counter() - start)
+        check_totals(db, expected + sum(m for _, m, _ in extra))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Measure CalendarWindow month navigation: queries and latency, first visit vs. revisit.
+
+Fills a throwaway database with --sessions rows over --years, opens the
+calendar and steps back --months months, then forward again over the same
+months. Each step is timed until every summary has been rendered, and the
+range queries issued by CalendarData (a month's daily totals, a selected
+day's sessions) are counted; revisits should need none.
+
+Usage: python benchmarks/bench_calendar.py [--sessions 200000] [--years 5] [--months 12]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import DB, CalendarWindow  # noqa: E402
+
+
+class CountingDB(DB):
+    queries = 0
+
+    def get_daily_totals_between(self, *args):
+        self.queries += 1
+        return super().get_daily_totals_between(*args)
+
+    def get_sessions_between(self, *args):
+        self.queries += 1
+        return super().get_sessions_between(*args)
+
+
+def synthetic_sessions(rows, subjects, years, seed=1):
+    rng = random.Random(seed)
+    end = datetime.now()
+    span = int(years * 365 * 86400)
+    for _ in range(rows):
+        yield f"Subject {rng.randrange(subjects)}", round(rng.uniform(5, 60), 2), end - timedelta(seconds=rng.randrange(span))
+
+
+def wait_idle(app, window):
+    while window.worker._callbacks:
+        app.processEvents()
+        time.sleep(0.0005)
+    app.processEvents()
+
+
+def step(app, window, db, move):
+    queries = db.queries
+    start = time.perf_counter()
+    move()
+    wait_idle(app, window)
+    return (time.perf_counter() - start) * 1000, db.queries - queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--subjects", type=int, default=30)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--months", type=int, default=12)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CountingDB(os.path.join(tmp, "study.db"))
+        db.add_sessions_bulk(synthetic_sessions(args.sessions, args.subjects, args.years))
+
+        window = CalendarWindow(db, "light")
+        ms, queries = step(app, window, db, lambda: None)
+        print(f"open: {queries} queries")
+
+        print(f"{'navigation':<12}{'mean ms':>10}{'max ms':>10}{'queries':>9}")
+        for label, move in (("first visit", window.calendar.prev_month), ("revisit", window.calendar.next_month)):
+            samples = [step(app, window, db, move) for _ in range(args.months)]
+            times = [ms for ms, _ in samples]
+            print(f"{label:<12}{statistics.mean(times):>10.2f}{max(times):>10.2f}{sum(q for _, q in samples):>9}")
+
+        window.close()
+        app.processEvents()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
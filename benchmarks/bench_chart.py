@@ -0,0 +1,100 @@
+"""Measure ProgressChart redraw latency: pie rebuild vs. in-place update, and bar mode.
+
+"plot" is the time spent in ProgressChart itself; "draw" is the Qt event
+processing that follows, which runs the pending full Agg render (layout and
+text, a mostly fixed per-canvas cost) and the repaint. In-place bar updates
+blit the bars over a saved background inside plot_bars, so their "draw" is
+only the repaint. "bars session" adds one session to one subject per step,
+as saving a session does; "bars reorder" reshuffles every value, so each
+label is rendered again (the worst case). "total" is checked against
+TARGET_MS for both.
+Runs on Qt's offscreen platform, so no display is needed.
+
+Usage: python benchmarks/bench_chart.py [--sizes 10 100 500] [--bar-sizes 100 1000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import ProgressChart  # noqa: E402
+
+# Redraw budget for a bar chart update, 1,000 subjects included
+TARGET_MS = 50
+
+
+def subjects(count, step):
+    return [(i, f"Subject {i}", 600, (i * 37 + step * 11) % 600 + 1) for i in range(count)]
+
+
+def after_sessions(count, step):
+    """subjects(count, 0) after step 25 minute sessions, each on a different subject"""
+    rows = subjects(count, 0)
+    for i in range(1, step + 1):
+        sid, name, target, done = rows[i * 7 % count]
+        rows[i * 7 % count] = (sid, name, target, done + 25)
+    return rows
+
+
+def redraw_ms(app, chart, plot, count, repeat, rebuild=False, data=subjects):
+    """Best plot and draw times in milliseconds over repeat value changes"""
+    best_plot = best_draw = float("inf")
+    for step in range(1, repeat + 1):
+        if rebuild:
+            chart._wedges = chart._bars = []
+        start = time.perf_counter()
+        plot(data(count, step))
+        plotted = time.perf_counter()
+        app.processEvents()
+        best_plot = min(best_plot, plotted - start)
+        best_draw = min(best_draw, time.perf_counter() - plotted)
+    return best_plot * 1000, best_draw * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--bar-sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    chart = ProgressChart()
+    chart.load()
+    chart.resize(600, 500)
+    chart.show()
+    app.processEvents()
+
+    header = f"{'mode':<14}{'subjects':>9}{'plot ms':>10}{'draw ms':>10}{'total ms':>10}"
+    print(header)
+    rows = []
+    for count in args.sizes:
+        chart.plot(subjects(count, 0))
+        app.processEvents()
+        rows.append(("pie rebuild", count, redraw_ms(app, chart, chart.plot, count, args.repeat, rebuild=True)))
+        rows.append(("pie update", count, redraw_ms(app, chart, chart.plot, count, args.repeat)))
+    for count in args.bar_sizes:
+        chart.plot_bars(subjects(count, 0))
+        app.processEvents()
+        rows.append(("bars session", count,
+                     redraw_ms(app, chart, chart.plot_bars, count, args.repeat, data=after_sessions)))
+        rows.append(("bars reorder", count, redraw_ms(app, chart, chart.plot_bars, count, args.repeat)))
+    slow = []
+    for mode, count, (plot_ms, draw_ms) in rows:
+        print(f"{mode:<14}{count:>9}{plot_ms:>10.1f}{draw_ms:>10.1f}{plot_ms + draw_ms:>10.1f}")
+        if mode.startswith("bars") and plot_ms + draw_ms > TARGET_MS:
+            slow.append((mode, count))
+    for mode, count in slow:
+        print(f"below target: {mode} at {count} subjects takes over {TARGET_MS} ms")
+    chart.close()
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
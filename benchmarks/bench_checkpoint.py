@@ -0,0 +1,83 @@
+"""Measure the cost of journaling an in-progress session.
+
+Times DB.checkpoint_session on its own, then StudyMaster._tick with and
+without a checkpoint due, to show how much a checkpoint adds to a tick.
+
+Usage: python benchmarks/bench_checkpoint.py [--count 2000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import StudyMaster  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def summarize(label, samples):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:<24}{statistics.mean(samples):>10.1f}{p99:>10.1f}{samples[-1]:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        clock = FakeClock()
+        window = StudyMaster(clock=clock)
+        window.pomodoro_seconds = args.count * window.CHECKPOINT_SECONDS * 2
+        window.reset_timer()
+        window.current_subject_id = window.db.add_subject("Checkpoint", 60)
+        window.start_pause_timer()
+        app.processEvents()
+
+        direct = []
+        for i in range(args.count):
+            start = time.perf_counter()
+            window.db.checkpoint_session(window.current_subject_id, i)
+            direct.append((time.perf_counter() - start) * 1e6)
+
+        plain, journaled = [], []
+        for _ in range(args.count):
+            clock.now += 1
+            start = time.perf_counter()
+            window._tick()
+            plain.append((time.perf_counter() - start) * 1e6)
+            clock.now += window.CHECKPOINT_SECONDS
+            start = time.perf_counter()
+            window._tick()
+            journaled.append((time.perf_counter() - start) * 1e6)
+
+        print(f"{'µs':<24}{'mean':>10}{'p99':>10}{'max':>10}")
+        summarize("checkpoint_session", direct)
+        summarize("_tick", plain)
+        summarize("_tick + checkpoint", journaled)
+        print(f"a checkpoint runs every {window.CHECKPOINT_SECONDS} s of a session")
+        window.close()
+        app.processEvents()
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
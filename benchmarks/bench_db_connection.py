@@ -0,0 +1,122 @@
+"""Compare DB throughput with a connection per call vs. the pooled connection.
+
+Usage: python benchmarks/bench_db_connection.py [--sessions 100000] [--seconds 2]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DB, to_epoch  # noqa: E402
+
+
+class PerCallDB(DB):
+    """The old behaviour: open and close a connection for every query."""
+
+    def _connect(self):
+        return sqlite3.connect(self.filename)
+
+    @contextmanager
+    def _get_cursor(self):
+        conn = sqlite3.connect(self.filename)
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            conn.close()
+
+
+def populate(filename, subjects, sessions, years=3):
+    db = DB(filename)
+    ids = [db.add_subject(f"Subject {i}", 600) for i in range(subjects)]
+    start = datetime.now() - timedelta(days=years * 365)
+    step = (years * 365 * 86400) / sessions
+    rows = []
+    for i in range(sessions):
+        ts = start + timedelta(seconds=i * step)
+        rows.append((random.choice(ids), 25.0, ts.isoformat(), to_epoch(ts)))
+    with db._get_cursor() as cur:
+        cur.executemany("INSERT INTO sessions (subject_id, minutes, ts, ts_epoch) VALUES (?, ?, ?, ?)", rows)
+        cur.execute("""
+            UPDATE subjects SET total_done_minutes =
+                (SELECT COALESCE(SUM(minutes), 0) FROM sessions WHERE subject_id = subjects.id)
+        """)
+    db.rebuild_daily_totals()
+    db.close()
+    return ids
+
+
+OPERATIONS = ("list_subjects", "get_sessions_for_day", "add_session", "register_session")
+
+
+def ops_per_second(fn, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        count += 1
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "bench.db")
+        ids = populate(filename, args.subjects, args.sessions)
+        today = datetime.now().date().isoformat()
+
+        def workload(db):
+            # Keys must match OPERATIONS.
+            subj_id = random.choice(ids)
+
+            def list_subjects():
+                # Drop the subject cache so every call reaches SQLite, which is what is compared here
+                db._invalidate_subjects()
+                return db.list_subjects()
+
+            return {
+                "list_subjects": list_subjects,
+                "get_sessions_for_day": lambda: db.get_sessions_for_day(today),
+                "add_session": lambda: db.add_session(subj_id, 0.5),
+                "register_session": lambda: (
+                    db.add_session(subj_id, 0.5),
+                    list_subjects(),
+                    list_subjects(),
+                    db.get_sessions_for_subject(subj_id),
+                ),
+            }
+
+        print(f"{'operation':<24}{'per-call ops/s':>16}{'pooled ops/s':>16}{'speedup':>10}")
+        for name in OPERATIONS:
+            rates = []
+            for cls in (PerCallDB, DB):
+                # Every run starts from the same pristine copy so inserts made
+                # by one side do not slow the other one down.
+                copy = os.path.join(tmp, f"{cls.__name__}.db")
+                shutil.copyfile(filename, copy)
+                db = cls(copy)
+                rates.append(ops_per_second(workload(db)[name], args.seconds))
+                db.close()
+                os.remove(copy)
+            b, a = rates
+            print(f"{name:<24}{b:>16.1f}{a:>16.1f}{a / b:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
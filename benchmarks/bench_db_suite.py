@@ -0,0 +1,199 @@
+"""Time every DB read path against synthetic histories of several sizes and write a JSON report.
+
+For each combination of --years and --sessions-per-day a study.db is built
+with synthetic_history.generate_history (kept in --data-dir between runs, so
+two commits can be measured against the same files). Histories end on the
+fixed synthetic_history.HISTORY_END, so every run, on any day, measures the
+same data. Each query path is then run --repeat times on a warm connection,
+picking a day, week and month from the middle of the history and the most
+studied subject.
+
+The report holds the environment (Python, SQLite, platform, git commit) and,
+per size, the median/min/p95 milliseconds and row count of every query. Pass
+--compare with an earlier report to print the change per query; the run
+exits non-zero when any median is more than --tolerance times slower and at
+least --min-delta milliseconds slower, so sub-millisecond jitter on the
+cheapest queries is not reported. No display is needed.
+
+Usage: python benchmarks/bench_db_suite.py [--years 1 3 10] [--sessions-per-day 8 32] [--subjects 20]
+           [--repeat 30] [--output report.json] [--compare baseline.json] [--tolerance 1.5]
+           [--min-delta 0.1] [--data-dir DIR]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from main import DB, gregorian_to_jalali  # noqa: E402
+from synthetic_history import HISTORY_END, generate_history  # noqa: E402
+
+
+def query_paths(db, years):
+    """name -> zero-argument callable for each DB read path, aimed at the middle of the history"""
+    day = HISTORY_END.date() - timedelta(days=int(years * 365 / 2))
+    week_start = day - timedelta(days=(day.weekday() - 5) % 7)
+    week_end = week_start + timedelta(days=6)
+    jy, jm, _ = gregorian_to_jalali(day.year, day.month, day.day)
+    top_subject = max(db.list_subjects(), key=lambda s: s[3])[0]
+    return {
+        "list_subjects": db.list_subjects,
+        "get_subject": lambda: db.get_subject(top_subject),
+        "get_sessions_for_subject": lambda: db.get_sessions_for_subject(top_subject),
+        "get_sessions_for_day": lambda: db.get_sessions_for_day(day.isoformat()),
+        "get_sessions_for_week": lambda: db.get_sessions_for_week(week_start.isoformat(), week_end.isoformat()),
+        "get_sessions_for_month": lambda: db.get_sessions_for_month(jy, jm),
+        "get_study_days_for_j_month": lambda: db.get_study_days_for_j_month(jy, jm),
+        "get_sessions_for_j_month": lambda: db.get_sessions_for_j_month(jy, jm),
+        "count_export_sessions": db.count_export_sessions,
+    }
+
+
+def row_count(result):
+    if isinstance(result, int):
+        return result
+    if result is None:
+        return 0
+    if isinstance(result, tuple) and not all(isinstance(row, tuple) for row in result):
+        return 1  # a single row, e.g. get_subject
+    return len(result)
+
+
+def time_query(fn, repeat):
+    rows = row_count(fn())
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(samples[0], 4),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 4),
+        "rows": rows,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(data_dir, subjects, sessions_per_day, years, seed, repeat):
+    end = HISTORY_END.strftime("%Y%m%d")
+    filename = os.path.join(data_dir, f"history_{subjects}s_{sessions_per_day}d_{years:g}y_{seed}_{end}.db")
+    if not os.path.exists(filename):
+        generate_history(filename, subjects, sessions_per_day, years, seed)
+    db = DB(filename)
+    try:
+        sessions = db.count_export_sessions()
+        queries = {name: time_query(fn, repeat) for name, fn in query_paths(db, years).items()}
+    finally:
+        db.close()
+    return {
+        "size": {"subjects": subjects, "sessions_per_day": sessions_per_day, "years": years, "seed": seed},
+        "sessions": sessions,
+        "queries": queries,
+    }
+
+
+def size_label(result):
+    size = result["size"]
+    return f"{size['years']:g}y x {size['sessions_per_day']}/day"
+
+
+def print_report(report):
+    for result in report["results"]:
+        print(f"\n{size_label(result)}: {result['sessions']} sessions, {result['size']['subjects']} subjects")
+        print(f"{'query':<30}{'median ms':>11}{'p95 ms':>10}{'rows':>9}")
+        for name, timing in result["queries"].items():
+            print(f"{name:<30}{timing['median_ms']:>11.3f}{timing['p95_ms']:>10.3f}{timing['rows']:>9}")
+
+
+def compare(report, baseline, tolerance, min_delta):
+    """Print median ratios against baseline for the sizes and queries both reports have; return the regressions"""
+    previous = {size_label(result): result["queries"] for result in baseline["results"]}
+    regressions = []
+    print(f"\ncompared with {baseline['environment'].get('commit') or 'baseline'} (ratio = new / old median)")
+    for result in report["results"]:
+        label = size_label(result)
+        if label not in previous:
+            continue
+        for name, timing in result["queries"].items():
+            old = previous[label].get(name)
+            if old is None:
+                continue
+            ratio = timing["median_ms"] / max(old["median_ms"], 1e-6)
+            slower = ratio > tolerance and timing["median_ms"] - old["median_ms"] > min_delta
+            flag = "  REGRESSION" if slower else ""
+            print(f"{label:<16}{name:<30}{old['median_ms']:>10.3f}{timing['median_ms']:>10.3f}{ratio:>8.2f}x{flag}")
+            if flag:
+                regressions.append((label, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--sessions-per-day", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout summary only)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed new/old median ratio")
+    parser.add_argument("--min-delta", type=float, default=0.1, help="ignore slowdowns smaller than this many ms")
+    parser.add_argument("--data-dir", help="keep generated databases here and reuse them")
+    args = parser.parse_args()
+
+    report = {
+        "environment": {
+            "commit": git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "history_end": HISTORY_END.date().isoformat(),
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for years in args.years:
+            for sessions_per_day in args.sessions_per_day:
+                report["results"].append(
+                    run_size(data_dir, args.subjects, sessions_per_day, years, args.seed, args.repeat)
+                )
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_delta)
+        if regressions:
+            print(f"FAIL: {len(regressions)} queries more than {args.tolerance:g}x slower")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
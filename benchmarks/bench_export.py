@@ -0,0 +1,73 @@
+"""Measure the streaming session export: throughput, file size and peak memory.
+
+Fills a throwaway database with --sessions rows, then runs SessionExportWorker
+synchronously for every format (Parquet only when pyarrow is installed).
+A second, traced run of each export records peak Python memory to show it
+stays flat as the database grows.
+
+Usage: python benchmarks/bench_export.py [--sessions 500000] [--subjects 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DB, SESSION_WRITERS, SessionExportWorker, parquet_available  # noqa: E402
+
+
+def synthetic_sessions(rows, subjects, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2020, 3, 21)
+    for _ in range(rows):
+        ts = start + timedelta(seconds=rng.randrange(5 * 365 * 86400))
+        yield f"Subject {rng.randrange(subjects)}", round(rng.uniform(5, 60), 2), ts
+
+
+def export(db, path):
+    worker = SessionExportWorker(db, path)
+    written = []
+    worker.completed.connect(written.append)
+    worker.failed.connect(lambda message: sys.exit(message))
+    worker.run()
+    return written[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=500_000)
+    parser.add_argument("--subjects", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DB(os.path.join(tmp, "study.db"))
+        db.add_sessions_bulk(synthetic_sessions(args.sessions, args.subjects))
+
+        print(f"{'format':<10}{'rows':>10}{'seconds':>10}{'rows/sec':>12}{'MiB':>8}{'peak KiB':>10}")
+        for extension in SESSION_WRITERS:
+            if extension == ".parquet" and not parquet_available():
+                print(f"{extension:<10}  skipped: pyarrow is not installed")
+                continue
+            path = os.path.join(tmp, f"sessions{extension}")
+            start = time.perf_counter()
+            rows = export(db, path)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            export(db, path)
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+            size = os.path.getsize(path) / 2**20
+            print(f"{extension:<10}{rows:>10}{seconds:>10.2f}{rows / seconds:>12,.0f}{size:>8.1f}{peak:>10.0f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
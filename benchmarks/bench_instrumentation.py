@@ -0,0 +1,101 @@
+"""Measure what the hot-path instrumentation costs, off and on, and check a profile can be taken.
+
+Times DB.get_subject three ways over --count calls: the undecorated method,
+the @timed wrapper with instrumentation disabled (what every user pays) and
+with it enabled (latency histogram plus SQL statement counting). Then runs a
+few user actions in an offscreen main window with instrumentation on, prints
+their per-action latency and query counts, and saves a cProfile of one
+"Select subject" to check the profile_next() path end to end.
+
+Usage: python benchmarks/bench_instrumentation.py [--count 20000]
+"""
+
+import argparse
+import os
+import pstats
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import DB, StudyMaster, instrumentation  # noqa: E402
+
+
+def per_call_us(fn, count, rounds=5):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn()
+        samples.append((time.perf_counter() - start) * 1e6 / count)
+    return statistics.median(samples)
+
+
+def wait_idle(app, window):
+    while window.db_worker._callbacks:
+        app.processEvents()
+        time.sleep(0.0005)
+    app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20_000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DB(os.path.join(tmp, "study.db"))
+        subject_id = db.add_subject("Subject 0", 25 * 60)
+        for i in range(1, 10):
+            db.add_subject(f"Subject {i}", 25 * 60)
+
+        raw = DB.get_subject.__wrapped__
+        raw_us = per_call_us(lambda: raw(db, subject_id), args.count)
+        off_us = per_call_us(lambda: db.get_subject(subject_id), args.count)
+        instrumentation.set_enabled(True)
+        on_us = per_call_us(lambda: db.get_subject(subject_id), args.count)
+        instrumentation.reset()
+
+        print(f"{'DB.get_subject':<24}{'µs/call':>10}{'overhead':>10}")
+        for label, us in (("undecorated", raw_us), ("disabled", off_us), ("enabled", on_us)):
+            print(f"{label:<24}{us:>10.2f}{us - raw_us:>+10.2f}")
+
+        window = StudyMaster(db=db)
+        window.show()
+        window.chart.load()
+        wait_idle(app, window)
+        profile = os.path.join(tmp, "select.prof")
+        instrumentation.profile_next("Select subject", profile)
+        for row in range(window.active_model.rowCount()):
+            window.on_subject_selected(row, 1, window.active_table)
+            wait_idle(app, window)
+        for index in range(3):
+            window.change_theme(index)
+            wait_idle(app, window)
+        window.start_pause_timer()
+        window.start_pause_timer()
+        window.reset_timer()
+        wait_idle(app, window)
+
+        print(f"\n{'action':<20}{'count':>7}{'mean ms':>10}{'p95 ms':>9}{'queries/action':>16}")
+        for name, stats in sorted(instrumentation.actions.items()):
+            print(f"{name:<20}{stats.count:>7}{stats.mean_ms:>10.2f}{stats.percentile(0.95):>9.2f}"
+                  f"{stats.mean_queries:>16.1f}")
+
+        if instrumentation.last_profile == profile and os.path.exists(profile):
+            calls = pstats.Stats(profile).total_calls
+            print(f"\nprofile of one 'Select subject': {calls} function calls")
+        else:
+            print("\nFAIL: no profile was written")
+        window.close()
+        app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Check the bulk Jalali converters against the scalar ones and time 1M conversions.
+
+Every day from Jalali year 1 up to ten years from now is converted both ways
+with the scalar functions and the NumPy versions; any disagreement or failed
+round trip aborts the run before timing starts.
+
+Usage: python benchmarks/bench_jalali.py [--dates 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import (  # noqa: E402
+    gregorian_to_jalali, gregorian_to_jalali_bulk, jalali_month_days,
+    jalali_to_gregorian, jalali_to_gregorian_bulk,
+)
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def valid_range():
+    first = date(*jalali_to_gregorian(1, 1, 1)).toordinal() - EPOCH_ORDINAL
+    last_jy = gregorian_to_jalali(date.today().year + 10, 12, 31)[0]
+    last = date(*jalali_to_gregorian(last_jy, 12, jalali_month_days(last_jy, 12))).toordinal() - EPOCH_ORDINAL
+    return np.arange(first, last + 1, dtype=np.int64)
+
+
+def verify(days):
+    jy, jm, jd = gregorian_to_jalali_bulk(days)
+    back = jalali_to_gregorian_bulk(jy, jm, jd)
+    if not np.array_equal(back, days):
+        raise SystemExit(f"bulk round trip failed for {np.count_nonzero(back != days)} days")
+    for day, y, m, d in zip(days.tolist(), jy.tolist(), jm.tolist(), jd.tolist()):
+        g = date.fromordinal(day + EPOCH_ORDINAL)
+        if gregorian_to_jalali(g.year, g.month, g.day) != (y, m, d):
+            raise SystemExit(f"gregorian_to_jalali disagrees with bulk for {g}")
+        if jalali_to_gregorian(y, m, d) != (g.year, g.month, g.day):
+            raise SystemExit(f"jalali_to_gregorian({y}, {m}, {d}) does not round-trip to {g}")
+    print(f"verified {len(days)} days ({date.fromordinal(int(days[0]) + EPOCH_ORDINAL)} .. "
+          f"{date.fromordinal(int(days[-1]) + EPOCH_ORDINAL)})")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dates", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    days = valid_range()
+    verify(days)
+
+    sample = np.random.default_rng(0).choice(days, args.dates)
+    gregorian = [date.fromordinal(d + EPOCH_ORDINAL) for d in sample.tolist()]
+    jy, jm, jd = gregorian_to_jalali_bulk(sample)
+    jalali = list(zip(jy.tolist(), jm.tolist(), jd.tolist()))
+
+    gregorian_to_jalali.cache_clear()
+    jalali_to_gregorian.cache_clear()
+    rows = [
+        ("gregorian_to_jalali (scalar loop)",
+         timed(lambda: [gregorian_to_jalali(g.year, g.month, g.day) for g in gregorian])),
+        ("gregorian_to_jalali_bulk", timed(lambda: gregorian_to_jalali_bulk(sample))),
+        ("jalali_to_gregorian (scalar loop)", timed(lambda: [jalali_to_gregorian(*j) for j in jalali])),
+        ("jalali_to_gregorian_bulk", timed(lambda: jalali_to_gregorian_bulk(jy, jm, jd))),
+    ]
+    print(f"{args.dates} dates")
+    for name, seconds in rows:
+        print(f"{name:<36}{seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
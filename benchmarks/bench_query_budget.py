@@ -0,0 +1,105 @@
+"""Count the SQL statements behind each UI action and fail when one goes over its budget.
+
+Opens the main window and the calendar offscreen on a throwaway database and
+runs each action under DB.trace_queries(), waiting for its background
+DBWorker requests so their queries are counted too. Prints statements, reads
+and any read run more than once (same arguments, or the same query in a loop),
+and exits non-zero when an action exceeds BUDGETS or repeats a read.
+
+Usage: python benchmarks/bench_query_budget.py [--subjects 20] [--sessions 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QDate  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import DB, CalendarWindow, QueryBudgetExceeded, StudyMaster  # noqa: E402
+
+# action -> most SQL statements it may run, background work included
+BUDGETS = {
+    "select subject": 1,
+    "save session": 4,
+    "add subject": 1,
+    "switch theme": 0,
+    "calendar: select day": 1,
+    "calendar: previous month": 1,
+    "calendar: next month (cached)": 0,
+}
+
+
+def wait_idle(app, *workers):
+    while any(worker._callbacks for worker in workers):
+        app.processEvents()
+        time.sleep(0.0005)
+    app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DB(os.path.join(tmp, "study.db"))
+        now = datetime.now()
+        db.add_sessions_bulk(
+            (f"Subject {rng.randrange(args.subjects)}", 25, now - timedelta(minutes=rng.randrange(400 * 24 * 60)))
+            for _ in range(args.sessions)
+        )
+        window = StudyMaster(db=db)
+        window.show()
+        window.chart.load()
+        calendar = CalendarWindow(db, "light", window, worker=window.db_worker, data=window.calendar_data)
+        wait_idle(app, window.db_worker)
+
+        def add_subject():
+            window.input_subject.setText("New subject")
+            window.add_subject_clicked()
+
+        actions = {
+            "select subject": lambda: window.on_subject_selected(0, 1, window.active_table),
+            "save session": lambda: window._register_session(25),
+            "add subject": add_subject,
+            "switch theme": lambda: window.change_theme(1),
+            "calendar: select day": lambda: calendar.show_day_details(QDate.currentDate().addDays(-3)),
+            "calendar: previous month": calendar.calendar.prev_month,
+            "calendar: next month (cached)": calendar.calendar.next_month,
+        }
+
+        failures = []
+        print(f"{'action':<32}{'statements':>11}{'reads':>7}{'budget':>8}")
+        for name, action in actions.items():
+            try:
+                with db.trace_queries(max_queries=BUDGETS[name], allow_repeats=False) as trace:
+                    action()
+                    wait_idle(app, window.db_worker)
+            except QueryBudgetExceeded:
+                failures.append(name)
+            print(f"{name:<32}{trace.count:>11}{trace.read_count:>7}{BUDGETS[name]:>8}")
+            for line in trace.summary().splitlines()[1:]:
+                print(f"    {line.strip()}")
+
+        calendar.close()
+        window.close()
+        app.processEvents()
+
+    for name in failures:
+        print(f"FAIL: {name} is over its query budget or repeats a read")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Time the indexed date-range queries on a large sessions table.
+
+Usage: python benchmarks/bench_range_queries.py [--sessions 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_db_connection import populate  # noqa: E402
+from main import DB, gregorian_to_jalali  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "bench.db")
+        ids = populate(filename, args.subjects, args.sessions, args.years)
+        db = DB(filename)
+        day = (datetime.now() - timedelta(days=200)).date()
+        week_end = day + timedelta(days=6)
+        jy, jm, _ = gregorian_to_jalali(day.year, day.month, day.day)
+        queries = {
+            "get_sessions_for_day": lambda: db.get_sessions_for_day(day.isoformat()),
+            "get_sessions_for_week": lambda: db.get_sessions_for_week(day.isoformat(), week_end.isoformat()),
+            "get_sessions_for_month": lambda: db.get_sessions_for_month(jy, jm),
+            "get_study_days_for_j_month": lambda: db.get_study_days_for_j_month(jy, jm),
+            "get_sessions_for_subject": lambda: db.get_sessions_for_subject(ids[0]),
+        }
+        print(f"{args.sessions} sessions over {args.years} years, best of {args.repeat}")
+        for name, fn in queries.items():
+            rows = len(fn())
+            print(f"{name:<30}{best_of(fn, args.repeat):>10.3f} ms{rows:>10} rows")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measure the shared resource cache: app icon and theme icon lookups, cold vs. cached.
+
+"cold" clears the caches before every call, which is what each window paid
+before the icon was memoized: probing the candidate paths and, when no icon
+file is bundled, painting the fallback pixmap. "cached" is every call after
+the first. Runs once from the repository (icon.png present) and once from an
+empty directory, where the fallback icon is painted.
+
+Usage: python benchmarks/bench_resources.py [--count 500]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import create_app_icon, find_resource, resource_path, theme_icon  # noqa: E402
+
+
+def clear_caches():
+    for cached in (create_app_icon, find_resource, resource_path, theme_icon):
+        cached.cache_clear()
+
+
+def timed_us(fn, count, cold):
+    samples = []
+    for _ in range(count):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.mean(samples), statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    cwd = os.getcwd()
+    print(f"{'µs':<32}{'cold mean':>11}{'cold med':>10}{'cached mean':>13}{'cached med':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for where, directory in (("bundled icon", ROOT), ("fallback icon", tmp)):
+            os.chdir(directory)
+            cases = [(f"create_app_icon ({where})", create_app_icon)]
+            if directory == ROOT:
+                cases.append(("theme_icon", lambda: theme_icon("document-save")))
+            for label, fn in cases:
+                cold = timed_us(fn, args.count, cold=True)
+                clear_caches()
+                warm = timed_us(fn, args.count, cold=False)
+                print(f"{label:<32}{cold[0]:>11.1f}{cold[1]:>10.1f}{warm[0]:>13.2f}{warm[1]:>12.2f}")
+        os.chdir(cwd)
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
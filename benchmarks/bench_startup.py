@@ -0,0 +1,133 @@
+"""Measure cold start: module import time, time to first paint and time until the chart is ready.
+
+Each run starts a fresh interpreter with -X importtime on Qt's offscreen
+platform and an empty study database. The child times `import main`, the first
+paint of the main window and the moment ProgressChart has built its matplotlib
+canvas, and marks the first paint in the import log so the modules imported
+before it can be told apart from the ones loaded afterwards.
+
+Fails when the median first paint exceeds --budget milliseconds or when
+matplotlib or NumPy is imported before the first paint, the regression this
+benchmark exists to catch.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--budget 500] [--top 8]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED_PACKAGES = ("matplotlib", "numpy")
+FIRST_PAINT_MARK = "startup: first paint"
+
+CHILD = f"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {ROOT!r})
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+import main
+marks = {{"import": time.perf_counter() - start}}
+
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and "paint" not in marks:
+            marks["paint"] = time.perf_counter() - start
+            print({FIRST_PAINT_MARK!r}, file=sys.stderr, flush=True)
+        return False
+
+
+def poll():
+    if window.chart.canvas is not None and "paint" in marks:
+        marks["chart"] = time.perf_counter() - start
+        window.close()
+        app.quit()
+
+
+app = QApplication(sys.argv)
+first_paint = FirstPaint()
+app.installEventFilter(first_paint)
+window = main.StudyMaster()
+window.show()
+timer = QTimer()
+timer.timeout.connect(poll)
+timer.start(1)
+app.exec_()
+print(json.dumps(marks))
+"""
+
+
+def parse_importtime(log):
+    """Split -X importtime output at the first paint mark: (before, after) lists of (cumulative us, module)"""
+    before, after = [], []
+    current = before
+    for line in log.splitlines():
+        if line == FIRST_PAINT_MARK:
+            current = after
+        elif line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                current.append((int(cumulative), module.rstrip()[1:]))
+    return before, after
+
+
+def run_once(tmp):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=tmp, env=env, capture_output=True, text=True, check=True,
+    )
+    marks = json.loads(result.stdout.splitlines()[-1])
+    marks = {name: seconds * 1000 for name, seconds in marks.items()}
+    return marks, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=500.0, help="allowed median first paint in ms")
+    parser.add_argument("--top", type=int, default=8, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # The first run also writes the font and matplotlib caches; it is not counted
+        run_once(tmp)
+        for _ in range(args.runs):
+            samples.append(run_once(tmp))
+
+    print(f"{'ms':<14}{'median':>10}{'min':>10}{'max':>10}")
+    for name, label in (("import", "import main"), ("paint", "first paint"), ("chart", "chart ready")):
+        values = [marks[name] for marks, _ in samples]
+        print(f"{label:<14}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+    before, after = samples[-1][1]
+    top_level = [(us, module) for us, module in before if not module.startswith(" ")]
+    print("\nslowest imports before first paint (cumulative ms, last run):")
+    for us, module in sorted(top_level, reverse=True)[:args.top]:
+        print(f"{us / 1000:>10.1f}  {module}")
+
+    failures = []
+    early = sorted({module.strip().split(".")[0] for _, module in before} & set(DEFERRED_PACKAGES))
+    if early:
+        failures.append(f"imported before first paint: {', '.join(early)}")
+    late = {module.strip().split(".")[0] for _, module in after}
+    missing = [package for package in DEFERRED_PACKAGES if package not in late and package not in early]
+    if missing:
+        failures.append(f"never imported: {', '.join(missing)} (is the chart still built?)")
+    paint = statistics.median(marks["paint"] for marks, _ in samples)
+    if paint > args.budget:
+        failures.append(f"median first paint {paint:.0f} ms exceeds the {args.budget:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time StudyMaster._load_subjects and a single-row update from a saved session at growing subject counts.
+
+Each size gets its own throwaway study.db; Qt runs on the offscreen platform.
+
+Usage: python benchmarks/bench_subject_tables.py [--sizes 500 5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import DB, StudyMaster  # noqa: E402
+
+
+def wait_idle(app, window):
+    """Pump the event loop until every queued background DB call has been delivered"""
+    while window.db_worker._callbacks:
+        app.processEvents()
+        time.sleep(0.0005)
+    app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000])
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    cwd = os.getcwd()
+    print(f"{'subjects':>8}{'reload ms':>12}{'refresh ms':>12}{'reload KiB':>12}")
+    for count in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            db = DB()
+            with db._get_cursor() as cur:
+                cur.executemany(
+                    "INSERT INTO subjects (name, target_minutes, total_done_minutes) VALUES (?, ?, ?)",
+                    [(f"Subject {i}", 100, i % 150) for i in range(count)],
+                )
+            db.close()
+
+            window = StudyMaster()
+            window.show()
+            wait_idle(app, window)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            window._tables_version = None  # reload even though the subjects have not changed
+            window._load_subjects()
+            wait_idle(app, window)
+            reload_ms = (time.perf_counter() - start) * 1000
+            reload_kib = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            window.db.add_session(1, 1.0)  # the subject_updated event moves or updates the row
+            wait_idle(app, window)
+            refresh_ms = (time.perf_counter() - start) * 1000
+
+            print(f"{count:>8}{reload_ms:>12.1f}{refresh_ms:>12.2f}{reload_kib:>12.0f}")
+            window.close()
+            window.deleteLater()
+            app.processEvents()
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Measure theme switch latency in StudyMaster with many subjects loaded.
+
+Cycles through every theme twice and times each switch until the event loop
+has painted it, including the chart redraw. The "full" run mimics the old
+switch: rebuild the stylesheet string, apply it, requery the subjects and
+replot the chart. The "cached" run uses change_theme, which applies the cached
+stylesheet and palette and recolours the chart in place.
+
+Usage: python benchmarks/bench_theme_switch.py [--subjects 1000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import DB, THEME_NAMES, StudyMaster, main_stylesheet  # noqa: E402
+
+
+def wait_idle(app, window):
+    while window.db_worker._callbacks:
+        app.processEvents()
+        time.sleep(0.0005)
+    app.processEvents()
+
+
+def full_switch(window, index):
+    window.current_theme = THEME_NAMES[index]
+    window.setStyleSheet(main_stylesheet.__wrapped__(window.current_theme))
+    window.delete_delegate.theme = window.themes[window.current_theme]
+    window.chart.theme = window.themes[window.current_theme]
+    window.chart.update_colors()
+    window._chart_version = None  # replot even though the subjects have not changed
+    window.update_chart()
+
+
+def measure(app, window, switch):
+    samples = []
+    for index in list(range(1, len(THEME_NAMES))) * 2 + [0]:
+        start = time.perf_counter()
+        switch(window, index)
+        wait_idle(app, window)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subjects", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db = DB()
+        with db._get_cursor() as cur:
+            cur.executemany(
+                "INSERT INTO subjects (name, target_minutes, total_done_minutes) VALUES (?, ?, ?)",
+                [(f"Subject {i}", 100, i % 150) for i in range(args.subjects)],
+            )
+        db.close()
+
+        window = StudyMaster()
+        window.show()
+        window.chart.load()
+        wait_idle(app, window)
+
+        print(f"{'switch':<8}{'mean ms':>10}{'median ms':>11}{'max ms':>9}")
+        for label, switch in (("full", full_switch), ("cached", StudyMaster.change_theme)):
+            samples = measure(app, window, switch)
+            print(f"{label:<8}{statistics.mean(samples):>10.1f}{statistics.median(samples):>11.1f}{max(samples):>9.1f}")
+
+        window.close()
+        app.processEvents()
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
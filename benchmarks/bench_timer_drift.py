@@ -0,0 +1,130 @@
+"""Check Pomodoro timer accuracy under a stalled event loop.
+
+Two runs, both headless:
+
+* simulated: a fake clock drives a full 50-minute StudyMaster session in which
+  every display tick arrives late (up to --max-stall seconds, plus a few long
+  freezes). The saved time is compared with the session length and with what
+  the old one-second-per-tick counter would have recorded.
+* real: a short session on time.monotonic while another QTimer blocks the GUI
+  thread for most of each 200 ms.
+
+Usage: python benchmarks/bench_timer_drift.py [--minutes 50] [--real-seconds 5]
+Exits non-zero when either run drifts by more than 100 ms.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication, QMessageBox  # noqa: E402
+
+from main import DB, StudyMaster  # noqa: E402
+
+TOLERANCE_SECONDS = 0.1
+
+
+class FakeClock:
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def saved_seconds(window, subj_id):
+    return window.db.get_subject(subj_id)[3] * 60
+
+
+def run_simulated(minutes, max_stall, seed):
+    rng = random.Random(seed)
+    clock = FakeClock()
+    window = StudyMaster(clock=clock)
+    subj_id = window.db.add_subject("Drift", minutes)
+    window.current_subject_id = subj_id
+    window.set_duration(minutes)
+    window.start_pause_timer()
+
+    legacy_ticks = 0
+    while window.timer_running:
+        delay = window.timer.remainingTime() / 1000
+        stall = rng.uniform(0, max_stall)
+        if rng.random() < 0.002:
+            stall += rng.uniform(10, 60)
+        clock.now += delay + stall
+        legacy_ticks += 1
+        window._tick()
+
+    saved = saved_seconds(window, subj_id)
+    window.close()
+    return saved, min(legacy_ticks, minutes * 60)
+
+
+def run_real(app, seconds, stall_ms):
+    window = StudyMaster()
+    subj_id = window.db.add_subject("Drift real", 1)
+    window.current_subject_id = subj_id
+    window.pomodoro_seconds = seconds
+    window.reset_timer()
+
+    blocker = QTimer()
+    blocker.timeout.connect(lambda: time.sleep(stall_ms / 1000))
+    blocker.start(200)
+
+    window.start_pause_timer()
+    while window.timer_running:
+        app.processEvents()
+        time.sleep(0.001)
+    blocker.stop()
+
+    saved = saved_seconds(window, subj_id)
+    window.close()
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, default=50)
+    parser.add_argument("--max-stall", type=float, default=0.8, help="seconds a tick may arrive late")
+    parser.add_argument("--real-seconds", type=int, default=5)
+    parser.add_argument("--real-stall-ms", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    QMessageBox.information = staticmethod(lambda *a, **k: QMessageBox.Ok)
+    cwd = os.getcwd()
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        DB().close()
+
+        expected = args.minutes * 60
+        saved, legacy = run_simulated(args.minutes, args.max_stall, args.seed)
+        drift = saved - expected
+        print(f"simulated {args.minutes} min: saved {saved:.3f} s, drift {drift * 1000:+.1f} ms "
+              f"(tick counting would have saved {legacy} s, drift {legacy - expected:+d} s)")
+        failed |= abs(drift) > TOLERANCE_SECONDS
+
+        saved = run_real(app, args.real_seconds, args.real_stall_ms)
+        drift = saved - args.real_seconds
+        print(f"real {args.real_seconds} s with {args.real_stall_ms} ms stalls: saved {saved:.3f} s, "
+              f"drift {drift * 1000:+.1f} ms")
+        failed |= abs(drift) > TOLERANCE_SECONDS
+
+        os.chdir(cwd)
+
+    if failed:
+        print(f"FAIL: drift exceeds {TOLERANCE_SECONDS * 1000:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare trigger-maintained subject totals against the Python-side counter updates.
+
+For each mode a fresh database gets --rows sessions through add_sessions_bulk
+(one aggregated UPDATE per subject vs. one trigger firing per row) and then
+--singles sessions through add_session. Finally reconcile_totals is timed on
+the result, which also confirms both modes left no drift.
+
+Usage: python benchmarks/bench_total_triggers.py [--rows 200000] [--singles 2000] [--subjects 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DB  # noqa: E402
+
+
+def synthetic_sessions(rows, subject_ids, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2020, 3, 21)
+    return [
+        (rng.choice(subject_ids), round(rng.uniform(5, 60), 2), start + timedelta(seconds=rng.randrange(5 * 365 * 86400)))
+        for _ in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--singles", type=int, default=2000)
+    parser.add_argument("--subjects", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'bulk s':>10}{'bulk rows/s':>14}{'single ms':>12}{'reconcile ms':>14}{'drift':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, triggers in (("python", False), ("trigger", True)):
+            db = DB(os.path.join(tmp, f"{mode}.db"))
+            subject_ids = [db.add_subject(f"Subject {i}", 100) for i in range(args.subjects)]
+            db.set_total_triggers(triggers)
+            # Seed one session so the bulk run takes the staged path a populated database would
+            db.add_session(subject_ids[0], 1.0)
+            rows = synthetic_sessions(args.rows, subject_ids)
+
+            start = time.perf_counter()
+            db.add_sessions_bulk(rows)
+            bulk = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i in range(args.singles):
+                db.add_session(subject_ids[i % len(subject_ids)], 25.0)
+            single = (time.perf_counter() - start) * 1000 / args.singles
+
+            start = time.perf_counter()
+            repaired = db.reconcile_totals()
+            reconcile = (time.perf_counter() - start) * 1000
+
+            print(f"{mode:<10}{bulk:>10.2f}{args.rows / bulk:>14,.0f}{single:>12.3f}{reconcile:>14.1f}{len(repaired):>7}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Measure the longest Qt event-loop stall while StudyMaster waits on a slow database.
+
+A DB subclass sleeps inside every read to simulate a cold disk or a huge
+history. A 10 ms heartbeat QTimer records the largest gap between ticks while
+the subject list, the selected subject's details and the calendar summaries
+reload. The actions themselves run from the event loop, so any read they do on
+the GUI thread shows up as a gap. With reads running on the DBWorker thread the gap should stay close to the heartbeat
+interval instead of growing with the read delay. The chart is left out on purpose: its draw cost is
+pure rendering and is measured by bench_chart.py.
+
+Usage: python benchmarks/bench_ui_responsiveness.py [--delay 0.3] [--budget 100]
+Exits non-zero when the worst gap exceeds --budget milliseconds.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QDate, QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from main import DB, StudyMaster  # noqa: E402
+
+HEARTBEAT_MS = 10
+
+
+class SlowDB(DB):
+    """DB whose reads each take `delay` seconds longer than they should"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        super().__init__()
+
+    def _slow(self, name, *args):
+        time.sleep(self.delay)
+        return getattr(super(), name)(*args)
+
+    def cached_subjects(self):
+        # Every subject read misses the cache and goes to the (slow) database
+        return None
+
+    def subjects_snapshot(self):
+        return self._slow("subjects_snapshot")
+
+    def list_subjects(self):
+        return self._slow("list_subjects")
+
+    def get_subject(self, *args):
+        return self._slow("get_subject", *args)
+
+    def get_sessions_for_day(self, *args):
+        return self._slow("get_sessions_for_day", *args)
+
+    def get_sessions_for_week(self, *args):
+        return self._slow("get_sessions_for_week", *args)
+
+    def get_sessions_for_month(self, *args):
+        return self._slow("get_sessions_for_month", *args)
+
+    def get_study_minutes_for_j_month(self, *args):
+        return self._slow("get_study_minutes_for_j_month", *args)
+
+    def get_recent_sessions_for_subject(self, *args):
+        return self._slow("get_recent_sessions_for_subject", *args)
+
+    def get_sessions_between(self, *args):
+        return self._slow("get_sessions_between", *args)
+
+    def get_daily_totals_between(self, *args):
+        return self._slow("get_daily_totals_between", *args)
+
+
+def wait_idle(app, window):
+    """Pump the event loop until every queued background DB call has been delivered"""
+    while window.db_worker._callbacks:
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--delay", type=float, default=0.3, help="seconds added to every read")
+    parser.add_argument("--budget", type=float, default=100.0, help="allowed worst gap in ms")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        seed = DB()
+        for i in range(20):
+            subj_id = seed.add_subject(f"Subject {i}", 60)
+            seed.add_session(subj_id, 5.0 + i)
+        seed.close()
+
+        window = StudyMaster(db=SlowDB(args.delay))
+        window.show()
+        window.chart.load()
+        wait_idle(app, window)
+        # Select a subject up front, so the one selected below renders a detail pane of the
+        # same height and the chart is not resized (and fully redrawn) in the middle
+        window.on_subject_selected(1, 0, window.active_table)
+        wait_idle(app, window)
+
+        worst = 0.0
+        last = time.perf_counter()
+
+        def tick():
+            nonlocal worst, last
+            now = time.perf_counter()
+            worst = max(worst, (now - last) * 1000)
+            last = now
+
+        heartbeat = QTimer()
+        heartbeat.timeout.connect(tick)
+        heartbeat.start(HEARTBEAT_MS)
+
+        done = False
+
+        def actions():
+            nonlocal done
+            window._load_subjects()
+            window.on_subject_selected(0, 0, window.active_table)
+            window.view_calendar()
+            calendar = window.calendar_window
+            calendar.show_day_details(QDate.currentDate())
+            calendar.calendar.prev_month()
+            calendar.calendar.next_month()
+            done = True
+
+        start = last = time.perf_counter()
+        QTimer.singleShot(0, actions)
+        while not done:
+            app.processEvents()
+            time.sleep(0.001)
+        wait_idle(app, window)
+        elapsed = (time.perf_counter() - start) * 1000
+        heartbeat.stop()
+
+        print(f"queued work finished in {elapsed:.0f} ms; worst event-loop gap {worst:.1f} ms")
+        window.close()
+        app.processEvents()
+        os.chdir(cwd)
+
+    if worst > args.budget:
+        print(f"FAIL: gap exceeds {args.budget:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
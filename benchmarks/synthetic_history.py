@@ -0,0 +1,78 @@
+"""Generate a synthetic study.db with years of daily Pomodoro history.
+
+Each day from --years before --end up to the day before it gets around
+--sessions-per-day sessions (some days are skipped, as rest days), back to
+back from the morning: mostly full 25 minute pomodoros, with the occasional
+cut-short one. A few subjects get most of the time, like a real study plan.
+The history ends on a fixed date (HISTORY_END unless --end is given), so the
+same arguments and --seed produce the same database on any day.
+
+Usable as a module (generate_history) or on its own:
+
+Usage: python benchmarks/synthetic_history.py OUT.db [--subjects 20] [--sessions-per-day 8] [--years 3] [--seed 1]
+           [--end 2025-03-21]
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import DB  # noqa: E402
+
+REST_DAY_CHANCE = 0.15
+POMODORO_MINUTES = 25
+BREAK_MINUTES = 5
+# 1 Farvardin 1404: the history ends on a Jalali year boundary
+HISTORY_END = datetime(2025, 3, 21)
+
+
+def synthetic_sessions(subject_ids, sessions_per_day, years, seed=1, end=HISTORY_END):
+    """Yield (subject id, minutes, ts) rows for the days before end, oldest first"""
+    rng = random.Random(seed)
+    # Zipf-like weights: the first subjects get most of the study time
+    weights = [1 / (rank + 1) for rank in range(len(subject_ids))]
+    end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    for days_ago in range(int(years * 365), 0, -1):
+        if rng.random() < REST_DAY_CHANCE:
+            continue
+        ts = end - timedelta(days=days_ago) + timedelta(hours=8, minutes=rng.randrange(120))
+        for _ in range(rng.randint(max(1, sessions_per_day // 2), max(1, sessions_per_day * 3 // 2))):
+            minutes = POMODORO_MINUTES if rng.random() < 0.9 else round(rng.uniform(5, POMODORO_MINUTES), 2)
+            yield rng.choices(subject_ids, weights)[0], minutes, ts
+            ts += timedelta(minutes=minutes + BREAK_MINUTES)
+
+
+def generate_history(filename, subjects=20, sessions_per_day=8, years=3, seed=1, end=HISTORY_END):
+    """Create filename with the synthetic history and return how many sessions it holds"""
+    for path in (filename, filename + "-wal", filename + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    db = DB(filename)
+    try:
+        subject_ids = [db.add_subject(f"Subject {i}", 25 * 60) for i in range(subjects)]
+        return db.add_sessions_bulk(synthetic_sessions(subject_ids, sessions_per_day, years, seed, end))
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output")
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--sessions-per-day", type=int, default=8)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=HISTORY_END,
+                        help="the history stops the day before this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    count = generate_history(args.output, args.subjects, args.sessions_per_day, args.years, args.seed, args.end)
+    print(f"{args.output}: {count} sessions, {args.subjects} subjects, {args.years:g} years")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,27 +4,41 @@
 
 import sys
 import sqlite3
-from contextlib import contextmanager
+import threading
+import time
+import math
+import cProfile
+import inspect
+import pstats
+import weakref
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta
+import calendar
+import copy
+import csv
+import importlib.util
+import json
 import os
+import queue
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from functools import lru_cache, wraps
+from itertools import chain
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QLineEdit, QTableWidget, QTableWidgetItem, QMessageBox, QInputDialog,
     QSpinBox, QFileDialog, QDialog, QDialogButtonBox, QFormLayout, QComboBox,
-    QTextEdit, QGroupBox, QTableWidget, QFrame, QScrollArea, QSizePolicy
+    QTextEdit, QGroupBox, QTableWidget, QFrame, QScrollArea, QSizePolicy,
+    QTableView, QStyledItemDelegate, QDateEdit, QProgressBar, QCheckBox, QShortcut
 )
-from PyQt5.QtCore import Qt, QTimer, QDate, pyqtSignal
-from PyQt5.QtGui import QFont, QIcon, QColor, QPixmap
-import matplotlib
-matplotlib.use("Qt5Agg")
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.font_manager as fm
-import matplotlib.pyplot as plt
-import numpy as np
+from PyQt5.QtCore import Qt, QTimer, QDate, pyqtSignal, QObject, QThread, QAbstractTableModel, QModelIndex, QEvent, QRect
+from PyQt5.QtGui import QFont, QIcon, QColor, QPixmap, QPainter, QPalette, QKeySequence
 
 
+@lru_cache(maxsize=None)
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
     try:
@@ -34,72 +48,75 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-DB_FILENAME = "study.db"
 
+@lru_cache(maxsize=None)
+def find_resource(relative_path):
+    """resource_path(relative_path) if that file exists, else None; the filesystem is probed once per path"""
+    path = resource_path(relative_path)
+    return path if os.path.exists(path) else None
 
-try:
-    font_path = resource_path('font/Vazir.ttf')  
-    if os.path.exists(font_path):
-        prop = fm.FontProperties(fname=font_path)
-    else:
-        prop = fm.FontProperties(family="Tahoma")
-except:
-    
-    prop = fm.FontProperties(family="Tahoma")
+DB_FILENAME = "study.db"
 
 
+FINGILISH_TABLE = str.maketrans({
+    'ا': 'a', 'آ': 'a', 'ب': 'b', 'پ': 'p', 'ت': 't', 'ث': 's',
+    'ج': 'j', 'چ': 'ch', 'ح': 'h', 'خ': 'kh',
+    'د': 'd', 'ذ': 'z', 'ر': 'r', 'ز': 'z', 'ژ': 'zh',
+    'س': 's', 'ش': 'sh', 'ص': 's', 'ض': 'z', 'ط': 't', 'ظ': 'z',
+    'ع': '', 'غ': 'gh', 'ف': 'f', 'ق': 'gh',
+    'ک': 'k', 'گ': 'g', 'ل': 'l', 'م': 'm', 'ن': 'n',
+    'و': 'o', 'ی': 'i',
+    'ه': 'h', 'ئ': 'i', 'ء': '',
+})
+# 'ی' starting a word is a consonant ('y'); 'و' after a vowel letter is 'v'.
+# Lookbehinds see the original text, so both rules are applied in one pass.
+FINGILISH_CONTEXT = re.compile(r"(?:(?<= )|^)ی|(?<=[اآوی])و")
+FINGILISH_CONTEXT_REPLACEMENTS = {'ی': 'y', 'و': 'v'}
+FINGILISH_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=FINGILISH_CACHE_SIZE)
 def persian_to_fingilish(text):
-    mapping = {
-        'ا': 'a', 'آ': 'a', 'ب': 'b', 'پ': 'p', 'ت': 't', 'ث': 's',
-        'ج': 'j', 'چ': 'ch', 'ح': 'h', 'خ': 'kh',
-        'د': 'd', 'ذ': 'z', 'ر': 'r', 'ز': 'z', 'ژ': 'zh',
-        'س': 's', 'ش': 'sh', 'ص': 's', 'ض': 'z', 'ط': 't', 'ظ': 'z',
-        'ع': '', 'غ': 'gh', 'ف': 'f', 'ق': 'gh',
-        'ک': 'k', 'گ': 'g', 'ل': 'l', 'م': 'm', 'ن': 'n',
-        'و': 'o',
-        'ه': 'h', 'ئ': 'i', 'ء': '', ' ': ' ',
-    }
-    result = ''
-    words = text.split(' ')
-    for word in words:
-        transliterated = ''
-        for i, ch in enumerate(word):
-            if ch == 'ی':
-                if i == 0:
-                    transliterated += 'y'
-                else:
-                    transliterated += 'i'
-            elif ch == 'و':
-                if i > 0 and word[i - 1] in ['ا', 'آ', 'و', 'ی']:
-                    transliterated += 'v'
-                else:
-                    transliterated += 'o'
-            else:
-                transliterated += mapping.get(ch, ch)
-        result += transliterated + ' '
-    return result.strip()
+    text = FINGILISH_CONTEXT.sub(lambda m: FINGILISH_CONTEXT_REPLACEMENTS[m.group()], text)
+    return text.translate(FINGILISH_TABLE).strip()
+
+
+def persian_to_fingilish_batch(names):
+    return [persian_to_fingilish(name) for name in names]
+
+
+# Day-number offsets tying the arithmetic in gregorian_to_jalali and
+# jalali_to_gregorian to plain "days since 1970-01-01" for the bulk versions.
+G2J_EPOCH_OFFSET = 1075195
+J2G_EPOCH_OFFSET = 719528
+GREGORIAN_MONTH_STARTS = (
+    (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334),
+    (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335),
+)
+SCALAR_DATE_CACHE_SIZE = 8192
 
 
+@lru_cache(maxsize=SCALAR_DATE_CACHE_SIZE)
 def gregorian_to_jalali(gy, gm, gd):
-    if gy > 1600:
-        gy -= 1600
-        jy = 979
-    else:
-        gy -= 621
-        jy = 0
-    gy2 = gm > 2 and gy + 1 or gy
-    days = 365 * gy + (gy2 + 3) // 4 - (gy2 + 99) // 100 + (gy2 + 399) // 400 - 80 + gd + (31 * (gm - 1) if gm <= 7 else 30 * (gm - 1) + 5)
-    jy += 33 * (days // 12053)
+    g_d_m = GREGORIAN_MONTH_STARTS[0]
+    gy2 = gy + 1 if gm > 2 else gy
+    days = 355666 + (365 * gy) + (gy2 + 3) // 4 - (gy2 + 99) // 100 + (gy2 + 399) // 400 + gd + g_d_m[gm - 1]
+    jy = -1595 + 33 * (days // 12053)
     days %= 12053
     jy += 4 * (days // 1461)
     days %= 1461
     if days > 365:
         jy += (days - 1) // 365
         days = (days - 1) % 365
-    jm = 1 + days // 31 if days < 186 else 7 + (days - 186) // 30
-    jd = 1 + days % 31
+    if days < 186:
+        jm = 1 + days // 31
+        jd = 1 + days % 31
+    else:
+        jm = 7 + (days - 186) // 30
+        jd = 1 + (days - 186) % 30
     return jy, jm, jd
 
+@lru_cache(maxsize=SCALAR_DATE_CACHE_SIZE)
 def jalali_to_gregorian(jy, jm, jd):
     
     if jm < 1 or jm > 12:
@@ -115,8 +132,11 @@ def jalali_to_gregorian(jy, jm, jd):
     gy = 400 * (days // 146097)
     days %= 146097
     if days > 36524:
-        gy += 100 * ((days - 1) // 36524)
-        days = (days - 1) % 36524
+        days -= 1
+        gy += 100 * (days // 36524)
+        days %= 36524
+        if days >= 365:
+            days += 1
     gy += 4 * (days // 1461)
     days %= 1461
     if days > 365:
@@ -125,35 +145,197 @@ def jalali_to_gregorian(jy, jm, jd):
     gd = days + 1
 
     
-    gm_d = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
-    gm = 1
-    for m in range(1, 13):
-        if m < len(gm_d) and gd <= gm_d[m]:
-            gm = m
-            break
-
-    gd -= gm_d[gm - 1] if gm > 0 else 0
+    month_starts = GREGORIAN_MONTH_STARTS[(gy % 4 == 0 and gy % 100 != 0) or gy % 400 == 0]
+    gm = bisect_left(month_starts, gd)
+    gd -= month_starts[gm - 1]
     return gy, gm, gd
 
+
+def gregorian_to_jalali_bulk(days):
+    """Vectorised gregorian_to_jalali: days since 1970-01-01 in, (jy, jm, jd) int arrays out"""
+    import numpy as np
+    days = np.asarray(days, dtype=np.int64) + G2J_EPOCH_OFFSET
+    jy = -1595 + 33 * (days // 12053)
+    days = days % 12053
+    jy += 4 * (days // 1461)
+    days %= 1461
+    past_leap_day = days > 365
+    jy += np.where(past_leap_day, (days - 1) // 365, 0)
+    days = np.where(past_leap_day, (days - 1) % 365, days)
+    first_half = days < 186
+    jm = np.where(first_half, 1 + days // 31, 7 + (days - 186) // 30)
+    jd = np.where(first_half, 1 + days % 31, 1 + (days - 186) % 30)
+    return jy, jm, jd
+
+
+def jalali_to_gregorian_bulk(jy, jm, jd):
+    """Vectorised inverse of gregorian_to_jalali_bulk: (jy, jm, jd) arrays in, days since 1970-01-01 out"""
+    import numpy as np
+    jy = np.asarray(jy, dtype=np.int64) + 1595
+    jm = np.asarray(jm, dtype=np.int64)
+    jd = np.asarray(jd, dtype=np.int64)
+    if jm.size and (jm.min() < 1 or jm.max() > 12):
+        raise ValueError("Invalid Jalali month in input. Must be between 1 and 12.")
+    days = -355668 + 365 * jy + jy // 33 * 8 + (jy % 33 + 3) // 4 + jd
+    days += np.where(jm < 7, (jm - 1) * 31, (jm - 7) * 30 + 186)
+    return days - J2G_EPOCH_OFFSET
+
+
+JALALI_MONTH_NAMES = ('Farvardin', 'Ordibehesht', 'Khordad', 'Tir', 'Mordad', 'Shahrivar',
+                      'Mehr', 'Aban', 'Azar', 'Dey', 'Bahman', 'Esfand')
+
+
 def is_jalali_leap(jy):
     return jy % 33 in [1, 5, 9, 13, 17, 22, 26, 30]
 
 
+def jalali_month_days(jy, jm):
+    return 31 if jm <= 6 else 30 if jm <= 11 else 30 if is_jalali_leap(jy) else 29
+
+
+def to_epoch(dt):
+    """Seconds since 1970-01-01 for a naive local datetime, matching SQLite's strftime('%s', ts)"""
+    return calendar.timegm(dt.timetuple())
+
+
+def integer_affinity(value):
+    """value as SQLite stores it in an INTEGER column: whole floats become ints"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_session_file(path):
+    """Stream (subject, minutes, ts) from a session export: CSV, JSONL or Parquet.
+
+    The CSV header must name 'minutes' and 'ts' and may add a 'subject' column;
+    JSONL lines and Parquet columns use the same keys. subject is None when absent.
+    """
+    if path.lower().endswith(".parquet"):
+        yield from _iter_parquet_sessions(path)
+        return
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get("subject"), record["minutes"], record["ts"]
+            return
+        reader = csv.reader(f)
+        columns = [c.strip().lower() for c in next(reader, [])]
+        if "minutes" not in columns or "ts" not in columns:
+            raise ValueError("The CSV header must contain 'minutes' and 'ts' columns.")
+        minutes_col, ts_col = columns.index("minutes"), columns.index("ts")
+        subject_col = columns.index("subject") if "subject" in columns else None
+        for row in reader:
+            if row:
+                subject = row[subject_col] if subject_col is not None else None
+                yield subject, row[minutes_col], row[ts_col]
+
+
+EXPORT_FIELDS = ("subject", "minutes", "ts")
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet files need the optional pyarrow package (pip install pyarrow).")
+    return pyarrow
+
+
+def _iter_parquet_sessions(path):
+    pa = _import_pyarrow()
+    parquet = pa.parquet.ParquetFile(path)
+    has_subject = "subject" in parquet.schema_arrow.names
+    for batch in parquet.iter_batches(columns=list(EXPORT_FIELDS if has_subject else EXPORT_FIELDS[1:])):
+        columns = batch.to_pydict()
+        subjects = columns["subject"] if has_subject else [None] * batch.num_rows
+        yield from zip(subjects, columns["minutes"], columns["ts"])
+
+
+class CsvSessionWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_FIELDS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSessionWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+        self._encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def write(self, rows):
+        # Formatting the three known keys directly is several times faster than json.dumps(dict(...)) per row
+        encode = self._encode
+        self._file.writelines(
+            f'{{"subject": {encode(subject)}, "minutes": {encode(minutes)}, "ts": {encode(ts)}}}\n'
+            for subject, minutes, ts in rows
+        )
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSessionWriter:
+    """Compressed columnar export; every chunk becomes one row group"""
+
+    def __init__(self, path):
+        self._pa = _import_pyarrow()
+        self._schema = self._pa.schema([
+            ("subject", self._pa.string()),
+            ("minutes", self._pa.float64()),
+            ("ts", self._pa.string()),
+        ])
+        self._writer = self._pa.parquet.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(column) for column in zip(*rows)], schema=self._schema
+        ))
+
+    def close(self):
+        self._writer.close()
+
+
+SESSION_WRITERS = {
+    ".csv": CsvSessionWriter,
+    ".jsonl": JsonlSessionWriter,
+    ".parquet": ParquetSessionWriter,
+}
+
+
+def date_range_epoch(start_date, end_date):
+    """Half-open [start, end) epoch bounds covering the 'YYYY-MM-DD' days start_date..end_date"""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    return to_epoch(start), to_epoch(end)
+
+
+APP_ICON_FILES = ('icon.png', 'icon.ico', 'assets/icon.png', 'images/icon.png')
+CHART_FONT_FILE = 'font/Vazir.ttf'
+RESOURCE_FILES = APP_ICON_FILES + (CHART_FONT_FILE,)
+
+
+@lru_cache(maxsize=None)
 def create_app_icon():
-    """Load custom icon or create a default one"""
-    
-    icon_paths = [
-        resource_path('icon.png'),
-        resource_path('icon.ico'),
-        resource_path('assets/icon.png'),
-        resource_path('images/icon.png'),
-        'icon.png',  
-        'icon.ico'
-    ]
+    """Load custom icon or create a default one. Built once and shared by every window"""
     
-    for icon_path in icon_paths:
+    for icon_path in map(find_resource, APP_ICON_FILES):
         try:
-            if os.path.exists(icon_path):
+            if icon_path is not None:
                 icon = QIcon(icon_path)
                 if not icon.isNull():
                     return icon
@@ -205,22 +387,498 @@ def create_app_icon():
     return QIcon(pixmap)
 
 
+@lru_cache(maxsize=None)
+def theme_icon(name):
+    """QIcon.fromTheme, looked up once per name; each lookup searches the icon theme directories"""
+    return QIcon.fromTheme(name)
+
+
+def preload_resources():
+    """Probe every bundled resource file once. Only touches the filesystem, so any thread may call it"""
+    for relative_path in RESOURCE_FILES:
+        find_resource(relative_path)
+
+
+class LatencyHistogram:
+    """Call count, total and worst latency, and a count per log-spaced latency bucket (milliseconds)"""
+    BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect_left(self.BOUNDS_MS, ms)] += 1
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding that fraction of the calls; the max for the open-ended last one"""
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= fraction * self.count:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class ActionStats(LatencyHistogram):
+    """End-to-end latency of one kind of user action, background DB work included, and its SQL statements"""
+
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+        self.max_queries = 0
+        # fingerprint -> most times one run repeated that read
+        self.repeated = {}
+
+    @property
+    def mean_queries(self):
+        return self.queries / self.count if self.count else 0.0
+
+
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\bX'[0-9A-Fa-f]*'|(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+SQL_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+TRANSACTION_STATEMENTS = ("BEGIN", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+def sql_fingerprint(statement):
+    """statement with its literal values replaced by ?, so runs with different arguments compare equal"""
+    statement = SQL_LITERALS.sub("?", statement)
+    statement = SQL_VALUE_LISTS.sub("(...)", statement)
+    return " ".join(statement.split())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryTrace:
+    """SQL statements run while tracing: how many, and which reads ran more than once.
+
+    Statements arrive from sqlite3's trace callback with their arguments filled
+    in. Transaction control (BEGIN, COMMIT, ...) is not counted. Reads are
+    kept per exact statement and per fingerprint, so a read run twice with the
+    same arguments (wasted) and one run N_PLUS_ONE times or more with
+    different arguments (a query in a loop) can both be reported. Writes are
+    only counted: executemany() reports one statement per row.
+    """
+    N_PLUS_ONE = 5
+    READS = ("SELECT", "WITH", "VALUES")
+
+    def __init__(self):
+        self.count = 0
+        self.reads = Counter()
+        self.read_fingerprints = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, statement):
+        keyword = statement.lstrip()[:9].upper()
+        if keyword.startswith(TRANSACTION_STATEMENTS):
+            return
+        is_read = keyword.startswith(self.READS)
+        fingerprint = sql_fingerprint(statement) if is_read else None
+        with self._lock:
+            self.count += 1
+            if is_read:
+                self.reads[statement] += 1
+                self.read_fingerprints[fingerprint] += 1
+
+    @property
+    def read_count(self):
+        return sum(self.reads.values())
+
+    def duplicates(self):
+        """{statement: times run} for reads run more than once with the same arguments"""
+        return {statement: n for statement, n in self.reads.items() if n > 1}
+
+    def n_plus_one(self):
+        """{fingerprint: times run} for reads run at least N_PLUS_ONE times"""
+        return {fp: n for fp, n in self.read_fingerprints.items() if n >= self.N_PLUS_ONE}
+
+    def repeated(self):
+        """{fingerprint: times run} for every read that is duplicated or run in a loop"""
+        repeated = {sql_fingerprint(statement): 0 for statement in self.duplicates()}
+        repeated.update(self.n_plus_one())
+        return {fp: self.read_fingerprints[fp] for fp in repeated}
+
+    def summary(self):
+        lines = [f"{self.count} statements, {self.read_count} reads"]
+        for statement, n in sorted(self.duplicates().items(), key=lambda item: -item[1]):
+            lines.append(f"  {n}x identical: {' '.join(statement.split())}")
+        for fp, n in sorted(self.n_plus_one().items(), key=lambda item: -item[1]):
+            lines.append(f"  {n}x in a loop: {fp}")
+        return "\n".join(lines)
+
+    def check(self, max_queries=None, max_reads=None, allow_repeats=True):
+        """Raise QueryBudgetExceeded when over either budget, or on any repeated read unless allow_repeats"""
+        problems = []
+        if max_queries is not None and self.count > max_queries:
+            problems.append(f"{self.count} statements, budget {max_queries}")
+        if max_reads is not None and self.read_count > max_reads:
+            problems.append(f"{self.read_count} reads, budget {max_reads}")
+        if not allow_repeats and self.repeated():
+            problems.append("repeated reads")
+        if problems:
+            raise QueryBudgetExceeded(f"{'; '.join(problems)}\n{self.summary()}")
+
+
+class ActionRun:
+    """One invocation of a user action, alive until its synchronous part and DBWorker requests are done"""
+
+    def __init__(self, name, profile_path=None):
+        self.name = name
+        self.started = time.perf_counter()
+        self.trace = QueryTrace()
+        self.pending = 1
+        self.profile_path = profile_path
+        self.profiles = [] if profile_path else None
+
+
+class Instrumentation:
+    """Timings of instrumented functions and per-action latency and SQL statement counts.
+
+    Everything is off until enabled; a disabled @timed function pays one
+    attribute check. User actions (@user_action or action()) hand their run to
+    DBWorker requests, so background queries are counted against the click
+    that caused them, and reads one run repeats are reported on stderr the
+    first time and kept per action. profile_next() records a cProfile of the next run of an
+    action, GUI and worker threads merged, and saves it when the run is done.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.action_names = set()
+        self.last_profile = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._dbs = weakref.WeakSet()
+        self._armed = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timings = {}
+            self.actions = {}
+            self.queries = 0
+
+    def set_enabled(self, enabled):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        for db in list(self._dbs):
+            if enabled:
+                db.add_query_tracer(self._on_statement)
+            else:
+                db.remove_query_tracer(self._on_statement)
+
+    def watch(self, db):
+        """Count the SQL statements db runs while enabled"""
+        self._dbs.add(db)
+        if self.enabled:
+            db.add_query_tracer(self._on_statement)
+
+    def record(self, label, ms):
+        with self._lock:
+            histogram = self.timings.get(label)
+            if histogram is None:
+                histogram = self.timings[label] = LatencyHistogram()
+            histogram.add(ms)
+
+    def _on_statement(self, statement):
+        if statement.lstrip()[:9].upper().startswith(TRANSACTION_STATEMENTS):
+            return
+        run = getattr(self._local, "run", None)
+        with self._lock:
+            self.queries += 1
+            if run is not None:
+                run.trace.add(statement)
+
+    def current_run(self):
+        return getattr(self._local, "run", None)
+
+    def profile_next(self, name, path):
+        self._armed = (name, path)
+
+    @property
+    def profile_armed(self):
+        return self._armed[0] if self._armed else None
+
+    @contextmanager
+    def action(self, name):
+        """Attribute everything done inside, and in the DBWorker requests it queues, to the user action name"""
+        self.action_names.add(name)
+        if self.current_run() is not None or not (self.enabled or self._armed):
+            yield
+            return
+        profile_path = None
+        if self._armed and self._armed[0] == name:
+            profile_path = self._armed[1]
+            self._armed = None
+        run = ActionRun(name, profile_path)
+        try:
+            with self.attached(run):
+                yield
+        finally:
+            self.release(run)
+
+    @contextmanager
+    def attached(self, run):
+        """Make run the current action on this thread, profiling it if a profile was asked for"""
+        previous = getattr(self._local, "run", None)
+        self._local.run = run
+        profiler = None
+        if run.profiles is not None and not getattr(self._local, "profiling", False):
+            profiler = cProfile.Profile()
+            self._local.profiling = True
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._local.profiling = False
+                with self._lock:
+                    run.profiles.append(profiler)
+            self._local.run = previous
+
+    def hold(self, run):
+        """A DBWorker request now belongs to run; release() it once its callbacks have run"""
+        run.pending += 1
+
+    def release(self, run):
+        run.pending -= 1
+        if run.pending:
+            return
+        ms = (time.perf_counter() - run.started) * 1000
+        with self._lock:
+            stats = self.actions.get(run.name)
+            if stats is None:
+                stats = self.actions[run.name] = ActionStats()
+            stats.add(ms)
+            stats.queries += run.trace.count
+            stats.max_queries = max(stats.max_queries, run.trace.count)
+            new_repeats = []
+            for fp, n in run.trace.repeated().items():
+                if fp not in stats.repeated:
+                    new_repeats.append((fp, n))
+                stats.repeated[fp] = max(n, stats.repeated.get(fp, 0))
+        for fp, n in new_repeats:
+            print(f"{run.name}: read ran {n} times in one action: {fp}", file=sys.stderr)
+        if run.profiles:
+            merged = pstats.Stats(run.profiles[0])
+            for profiler in run.profiles[1:]:
+                merged.add(profiler)
+            merged.dump_stats(run.profile_path)
+            self.last_profile = run.profile_path
+
+
+instrumentation = Instrumentation()
+
+
+def timed(label):
+    """Record each call's latency under label while instrumentation is enabled"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                instrumentation.record(label, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorate
+
+
+def instrumented(cls):
+    """Class decorator: @timed on every public method defined by cls, generators excepted"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(attr) or inspect.isgeneratorfunction(attr):
+            continue
+        setattr(cls, name, timed(f"{cls.__name__}.{name}")(attr))
+    return cls
+
+
+def user_action(name):
+    """Run the method as the user action name. Extra Qt signal arguments the method doesn't take are dropped"""
+    def decorate(fn):
+        params = inspect.signature(fn).parameters.values()
+        takes_varargs = any(p.kind is p.VAR_POSITIONAL for p in params)
+        positional = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params)
+        instrumentation.action_names.add(name)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not takes_varargs:
+                args = args[:positional]
+            with instrumentation.action(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class DBEvents(QObject):
+    """Changes committed through a DB, emitted from the thread that made them.
+
+    Subjects are (id, name, target, done) tuples as list_subjects() returns
+    them. Slots on GUI objects get queued calls for writes made on a DBWorker.
+    subjects_reset and sessions_changed cover bulk writes that are not worth
+    describing row by row: reload the subjects, and forget any sessions held
+    for the 'YYYY-MM-DD' dates (None for every date).
+    """
+    subject_added = pyqtSignal(object)
+    subject_updated = pyqtSignal(object)
+    subject_removed = pyqtSignal(int)
+    session_added = pyqtSignal(int, str, float, str)  # subject id, subject name, minutes, ts
+    subjects_reset = pyqtSignal()
+    sessions_changed = pyqtSignal(object)
+
+
+@instrumented
 class DB:
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-16000",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA temp_store=MEMORY",
+    )
+    STATEMENT_CACHE_SIZE = 256
+
     def __init__(self, filename=DB_FILENAME):
         self.filename = filename
+        self._local = threading.local()
+        self._connections = []
+        self._pool_lock = threading.Lock()
+        self.events = DBEvents()
+        self._query_tracers = []
+        # Subjects by id, kept in step with every write made through this DB; None until first read
+        self._subject_rows = None
+        self._subjects = None
+        self._subjects_lock = threading.Lock()
+        self.subjects_version = 0
+        instrumentation.watch(self)
         self._create_tables()
+        self.total_triggers = self._has_total_triggers()
+
+    def _connect(self):
+        """Return this thread's long-lived connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.filename,
+                cached_statements=self.STATEMENT_CACHE_SIZE,
+                check_same_thread=False,
+            )
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._pool_lock:
+                conn.set_trace_callback(self._trace if self._query_tracers else None)
+                self._connections.append(conn)
+        return conn
+
+    def _trace(self, statement):
+        for tracer in self._query_tracers:
+            tracer(statement)
+
+    def _set_query_tracers(self, tracers):
+        with self._pool_lock:
+            self._query_tracers = tracers
+            for conn in self._connections:
+                conn.set_trace_callback(self._trace if tracers else None)
+
+    def add_query_tracer(self, tracer):
+        """Call tracer(statement) for every SQL statement on every connection, from whichever thread runs it"""
+        self._set_query_tracers(self._query_tracers + [tracer])
+
+    def remove_query_tracer(self, tracer):
+        self._set_query_tracers([t for t in self._query_tracers if t != tracer])
+
+    @contextmanager
+    def trace_queries(self, max_queries=None, max_reads=None, allow_repeats=True):
+        """Collect the statements run inside the block, on any thread, into the QueryTrace it yields.
+
+        With a budget the block fails with QueryBudgetExceeded when it runs more
+        statements (or reads) than that, or repeats a read if allow_repeats is
+        False; the message lists the offending reads:
+
+            with db.trace_queries(max_queries=4, allow_repeats=False):
+                db.add_session(subject_id, 25)
+        """
+        trace = QueryTrace()
+        self.add_query_tracer(trace.add)
+        try:
+            yield trace
+        finally:
+            self.remove_query_tracer(trace.add)
+        trace.check(max_queries, max_reads, allow_repeats)
 
     @contextmanager
     def _get_cursor(self):
-        conn = sqlite3.connect(self.filename)
+        conn = self._connect()
+        cur = conn.cursor()
         try:
-            yield conn.cursor()
+            yield cur
             conn.commit()
         except Exception as e:
             conn.rollback()
             raise e
         finally:
-            conn.close()
+            cur.close()
+
+    # Each entry upgrades the schema by one version; PRAGMA user_version
+    # records how many have been applied so existing files upgrade in place.
+    FILL_DAILY_TOTALS = """
+        INSERT INTO daily_totals (date, subject_id, minutes, session_count)
+        SELECT date(ts_epoch, 'unixepoch'), subject_id, SUM(minutes), COUNT(*)
+        FROM sessions
+        GROUP BY 1, 2
+    """
+
+    SESSION_INDEXES = (
+        ("idx_sessions_ts", "CREATE INDEX IF NOT EXISTS idx_sessions_ts ON sessions (ts_epoch, subject_id, minutes)"),
+        ("idx_sessions_subject_ts", "CREATE INDEX IF NOT EXISTS idx_sessions_subject_ts ON sessions (subject_id, ts_epoch)"),
+    )
+
+    MIGRATIONS = (
+        (
+            "ALTER TABLE sessions ADD COLUMN ts_epoch INTEGER",
+            "UPDATE sessions SET ts_epoch = CAST(strftime('%s', ts) AS INTEGER)",
+            *(create for _, create in SESSION_INDEXES),
+        ),
+        (
+            """
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                date TEXT,
+                subject_id INTEGER,
+                minutes REAL DEFAULT 0,
+                session_count INTEGER DEFAULT 0,
+                PRIMARY KEY (date, subject_id)
+            ) WITHOUT ROWID
+            """,
+            FILL_DAILY_TOTALS,
+        ),
+        (
+            """
+            CREATE TABLE IF NOT EXISTS active_session (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                subject_id INTEGER,
+                seconds REAL,
+                updated TEXT
+            )
+            """,
+        ),
+    )
 
     def _create_tables(self):
         with self._get_cursor() as cur:
@@ -241,112 +899,876 @@ class DB:
                     FOREIGN KEY(subject_id) REFERENCES subjects(id)
                 )
             """)
+        self._migrate()
+
+    def schema_version(self):
+        with self._get_cursor() as cur:
+            cur.execute("PRAGMA user_version")
+            return cur.fetchone()[0]
+
+    def _migrate(self):
+        version = self.schema_version()
+        for target, statements in enumerate(self.MIGRATIONS[version:], version + 1):
+            with self._get_cursor() as cur:
+                cur.execute("BEGIN IMMEDIATE")
+                for sql in statements:
+                    cur.execute(sql)
+                cur.execute(f"PRAGMA user_version = {target}")
+
+    def rebuild_daily_totals(self):
+        """Recompute the daily_totals rollup from the sessions table"""
+        with self._get_cursor() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("DELETE FROM daily_totals")
+            cur.execute(self.FILL_DAILY_TOTALS)
+
+    # In trigger mode SQLite keeps subjects.total_done_minutes in step with every
+    # INSERT, DELETE and UPDATE on sessions, including edits made outside the app.
+    TOTAL_TRIGGERS = (
+        ("trg_sessions_total_insert", """
+            CREATE TRIGGER IF NOT EXISTS trg_sessions_total_insert AFTER INSERT ON sessions BEGIN
+                UPDATE subjects SET total_done_minutes = total_done_minutes + NEW.minutes WHERE id = NEW.subject_id;
+            END
+        """),
+        ("trg_sessions_total_delete", """
+            CREATE TRIGGER IF NOT EXISTS trg_sessions_total_delete AFTER DELETE ON sessions BEGIN
+                UPDATE subjects SET total_done_minutes = total_done_minutes - OLD.minutes WHERE id = OLD.subject_id;
+            END
+        """),
+        ("trg_sessions_total_update", """
+            CREATE TRIGGER IF NOT EXISTS trg_sessions_total_update AFTER UPDATE OF minutes, subject_id ON sessions BEGIN
+                UPDATE subjects SET total_done_minutes = total_done_minutes - OLD.minutes WHERE id = OLD.subject_id;
+                UPDATE subjects SET total_done_minutes = total_done_minutes + NEW.minutes WHERE id = NEW.subject_id;
+            END
+        """),
+    )
+    TOTAL_DRIFT_TOLERANCE = 1e-6
+
+    def _has_total_triggers(self):
+        with self._get_cursor() as cur:
+            cur.execute(
+                f"SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND name IN ({','.join('?' * len(self.TOTAL_TRIGGERS))})",
+                [name for name, _ in self.TOTAL_TRIGGERS],
+            )
+            return cur.fetchone()[0] == len(self.TOTAL_TRIGGERS)
+
+    def _total_drift(self, cur):
+        cur.execute("""
+            SELECT subjects.id, subjects.name, subjects.total_done_minutes, COALESCE(totals.minutes, 0)
+            FROM subjects
+            LEFT JOIN (
+                SELECT subject_id, SUM(minutes) AS minutes FROM sessions GROUP BY subject_id
+            ) AS totals ON totals.subject_id = subjects.id
+            WHERE ABS(subjects.total_done_minutes - COALESCE(totals.minutes, 0)) > ?
+        """, (self.TOTAL_DRIFT_TOLERANCE,))
+        return cur.fetchall()
+
+    def find_total_drift(self):
+        """List (id, name, stored total, total from sessions) for every subject whose counter is off"""
+        with self._get_cursor() as cur:
+            return self._total_drift(cur)
+
+    def reconcile_totals(self):
+        """Recompute drifted subject totals from sessions in one transaction; returns what was repaired"""
+        with self._get_cursor() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            drift = self._total_drift(cur)
+            cur.executemany(
+                "UPDATE subjects SET total_done_minutes = ? WHERE id=?",
+                [(actual, subj_id) for subj_id, _, _, actual in drift],
+            )
+        if drift:
+            self._invalidate_subjects()
+        return drift
+
+    def set_total_triggers(self, enabled):
+        """Switch between Python-side counter updates and trigger mode, reconciling in the same transaction"""
+        with self._get_cursor() as cur:
+            cur.execute("BEGIN IMMEDIATE")
+            for name, create in self.TOTAL_TRIGGERS:
+                cur.execute(create if enabled else f"DROP TRIGGER IF EXISTS {name}")
+            drift = self._total_drift(cur)
+            cur.executemany(
+                "UPDATE subjects SET total_done_minutes = ? WHERE id=?",
+                [(actual, subj_id) for subj_id, _, _, actual in drift],
+            )
+        self.total_triggers = enabled
+        if drift:
+            self._invalidate_subjects()
 
     def add_subject(self, name, target_minutes=0):
         with self._get_cursor() as cur:
             cur.execute("INSERT OR IGNORE INTO subjects (name, target_minutes) VALUES (?, ?)", (name, target_minutes))
-            return cur.lastrowid
+            # The connection is long-lived, so lastrowid would be stale for an ignored duplicate.
+            subj_id = cur.lastrowid if cur.rowcount else None
+        if subj_id is not None:
+            # Ids only grow, so the new subject goes last, where ORDER BY id would put it
+            subject = self._subject_written(subj_id, lambda _: (subj_id, name, integer_affinity(target_minutes), 0))
+            self.events.subject_added.emit(subject)
+        return subj_id
 
     def delete_subject(self, subj_id):
         with self._get_cursor() as cur:
             cur.execute("DELETE FROM sessions WHERE subject_id=?", (subj_id,))
+            cur.execute("DELETE FROM daily_totals WHERE subject_id=?", (subj_id,))
+            cur.execute("DELETE FROM active_session WHERE subject_id=?", (subj_id,))
             cur.execute("DELETE FROM subjects WHERE id=?", (subj_id,))
-
-    def list_subjects(self):
+        self._subject_written(subj_id, lambda _: None)
+        self.events.subject_removed.emit(subj_id)
+        self.events.sessions_changed.emit(None)
+
+    def _subject_map(self):
+        """(subjects_version, the id -> (id, name, target, done) cache), read from the database when empty"""
+        with self._subjects_lock:
+            if self._subject_rows is not None:
+                return self.subjects_version, self._subject_rows
+            version = self.subjects_version
         with self._get_cursor() as cur:
             cur.execute("SELECT id, name, target_minutes, total_done_minutes FROM subjects ORDER BY id")
-            return cur.fetchall()
+            rows = {row[0]: row for row in cur}
+        with self._subjects_lock:
+            # A write that landed while reading may not be in rows; keep them for this call only,
+            # under the version they were read at, so callers can tell they are already stale
+            if version == self.subjects_version:
+                self._subject_rows = rows
+        return version, rows
+
+    def _subject_written(self, subj_id, change):
+        """Apply change(old row or None) -> new row or None to the cached subject after a committed write.
+
+        Bumps subjects_version and returns the new row, read back from the
+        database when the cache is empty.
+        """
+        with self._subjects_lock:
+            rows = self._subject_rows
+            if rows is not None:
+                row = change(rows.get(subj_id))
+                if row is None:
+                    rows.pop(subj_id, None)
+                else:
+                    rows[subj_id] = row
+            self._subjects = None
+            self.subjects_version += 1
+        if rows is None:
+            with self._get_cursor() as cur:
+                cur.execute("SELECT id, name, target_minutes, total_done_minutes FROM subjects WHERE id=?", (subj_id,))
+                row = cur.fetchone()
+        return row
+
+    def _invalidate_subjects(self):
+        """Drop the cache after a write that is simpler to re-read than to apply, like a bulk import"""
+        with self._subjects_lock:
+            self._subject_rows = None
+            self._subjects = None
+            self.subjects_version += 1
+        self.events.subjects_reset.emit()
+
+    def subjects_snapshot(self):
+        """(subjects_version, subjects): an immutable tuple of (id, name, target, done) ordered by id.
+
+        Served from memory after the first call: writes made through this DB
+        update it in place, so it costs no SQL until a bulk import, reconcile or
+        trigger switch drops it. Writes by other programs are not seen until then.
+        A caller that keeps the version can skip its redraw when it hasn't changed.
+        """
+        with self._subjects_lock:
+            if self._subjects is not None:
+                return self.subjects_version, self._subjects
+        version, rows = self._subject_map()
+        with self._subjects_lock:
+            subjects = tuple(rows.values())
+            if rows is self._subject_rows:
+                version = self.subjects_version
+                self._subjects = subjects
+        return version, subjects
+
+    def cached_subjects(self):
+        """subjects_snapshot() when it needs no SQL, otherwise None"""
+        with self._subjects_lock:
+            if self._subjects is None:
+                return None
+            return self.subjects_version, self._subjects
+
+    def list_subjects(self):
+        return self.subjects_snapshot()[1]
+
+    def get_subject(self, subj_id):
+        return self._subject_map()[1].get(subj_id)
 
     def update_target(self, subj_id, minutes):
         with self._get_cursor() as cur:
             cur.execute("UPDATE subjects SET target_minutes=? WHERE id=?", (minutes, subj_id))
 
-    def add_session(self, subj_id, minutes):
+        def change(row):
+            if row is not None:
+                sid, name, _, done = row
+                return sid, name, integer_affinity(minutes), done
+        subject = self._subject_written(subj_id, change)
+        if subject is not None:
+            self.events.subject_updated.emit(subject)
+
+    def add_session(self, subj_id, minutes, ts=None):
+        with self._get_cursor() as cur:
+            now = ts or datetime.now()
+            cur.execute(
+                "INSERT INTO sessions (subject_id, minutes, ts, ts_epoch) VALUES (?, ?, ?, ?)",
+                (subj_id, minutes, now.isoformat(), to_epoch(now)),
+            )
+            cur.execute("""
+                INSERT INTO daily_totals (date, subject_id, minutes, session_count) VALUES (?, ?, ?, 1)
+                ON CONFLICT (date, subject_id) DO UPDATE SET
+                    minutes = minutes + excluded.minutes,
+                    session_count = session_count + 1
+            """, (now.date().isoformat(), subj_id, minutes))
+            if not self.total_triggers:
+                cur.execute("UPDATE subjects SET total_done_minutes = total_done_minutes + ? WHERE id=?", (minutes, subj_id))
+            # The saved session supersedes the checkpoint in the same transaction, so it is never counted
+            # twice; the journal holds the running timer's time whichever subject it was written for
+            cur.execute("DELETE FROM active_session")
+
+        def change(row):
+            if row is not None:
+                sid, name, target, done = row
+                # Same sum as the UPDATE above (or the trigger), so the cache matches the stored total
+                return sid, name, target, integer_affinity(done + minutes)
+        subject = self._subject_written(subj_id, change)
+        if subject is not None:
+            self.events.subject_updated.emit(subject)
+            self.events.session_added.emit(subj_id, subject[1], minutes, now.isoformat())
+
+    def add_sessions_bulk(self, sessions):
+        """Insert (subject, minutes, ts) rows in a single transaction and return how many were added.
+
+        subject is a subject id or a name (created when missing); ts is a
+        datetime or an ISO string. Rows are streamed through executemany, then
+        the per-day totals are summed in SQL from the inserted rows' ts_epoch,
+        the same way rebuild_daily_totals does, so each subject and day gets
+        one aggregated write and timestamps with a UTC offset land on the
+        same day as everywhere else. When the import outgrows the existing
+        history the session indexes are dropped and rebuilt afterwards, which
+        is much cheaper than maintaining them row by row; smaller imports are
+        staged in a temp table first to find that out.
+        """
+        with self._get_cursor() as cur:
+            lookup = cur.connection.cursor()
+            subject_ids = {}
+
+            def subject_id(subject):
+                sid = subject_ids.get(subject)
+                if sid is None:
+                    lookup.execute("INSERT OR IGNORE INTO subjects (name) VALUES (?)", (subject,))
+                    lookup.execute("SELECT id FROM subjects WHERE name=?", (subject,))
+                    sid = subject_ids[subject] = lookup.fetchone()[0]
+                return sid
+
+            def rows():
+                for subject, minutes, ts in sessions:
+                    if isinstance(subject, str):
+                        subject = subject_id(subject)
+                    if not isinstance(ts, str):
+                        ts = ts.isoformat()
+                    yield subject, float(minutes), ts
+
+            # sqlite3 autocommits DDL run outside a transaction, so open one first:
+            # a failed import then rolls the dropped indexes back with everything else.
+            cur.execute("BEGIN IMMEDIATE")
+            # The id range stands in for COUNT(*), which has to scan a whole index;
+            # it only decides whether to rebuild the indexes, so an estimate will do.
+            cur.execute("SELECT (SELECT MIN(id) FROM sessions), (SELECT MAX(id) FROM sessions)")
+            first_id, last_id = cur.fetchone()
+            existing = last_id - first_id + 1 if last_id is not None else 0
+            last_id = last_id or 0
+            reindex = False
+            try:
+                if existing:
+                    # Stage first: only once the import's size is known can we tell
+                    # whether rebuilding the indexes beats updating them.
+                    cur.execute("CREATE TEMP TABLE IF NOT EXISTS import_sessions (subject_id INTEGER, minutes REAL, ts TEXT)")
+                    cur.executemany("INSERT INTO import_sessions VALUES (?, ?, ?)", rows())
+                    staged = cur.rowcount
+                else:
+                    pending = rows()
+                    first = next(pending, None)
+                    if first is not None:
+                        reindex = True
+                        self._drop_session_indexes(cur)
+                        cur.executemany("""
+                            INSERT INTO sessions (subject_id, minutes, ts, ts_epoch)
+                            VALUES (?1, ?2, ?3, CAST(strftime('%s', ?3) AS INTEGER))
+                        """, chain((first,), pending))
+            finally:
+                lookup.close()
+            if existing:
+                reindex = staged > existing
+                if reindex:
+                    self._drop_session_indexes(cur)
+                cur.execute("""
+                    INSERT INTO sessions (subject_id, minutes, ts, ts_epoch)
+                    SELECT subject_id, minutes, ts, CAST(strftime('%s', ts) AS INTEGER) FROM import_sessions
+                """)
+                cur.execute("DROP TABLE import_sessions")
+            cur.execute("SELECT ts FROM sessions WHERE id > ? AND ts_epoch IS NULL LIMIT 1", (last_id,))
+            bad = cur.fetchone()
+            if bad is not None:
+                raise ValueError(f"Invalid session timestamp: {bad[0]!r}")
+            if reindex:
+                for _, create in self.SESSION_INDEXES:
+                    cur.execute(create)
+
+            # Grouped in (date, subject) order, so the upsert walks the daily_totals
+            # primary key; the groups also give the counts, dates and subject totals.
+            cur.execute("""
+                SELECT date(ts_epoch, 'unixepoch'), subject_id, SUM(minutes), COUNT(*)
+                FROM sessions
+                WHERE id > ?
+                GROUP BY 1, 2
+            """, (last_id,))
+            day_totals = cur.fetchall()
+            cur.executemany("""
+                INSERT INTO daily_totals (date, subject_id, minutes, session_count) VALUES (?, ?, ?, ?)
+                ON CONFLICT (date, subject_id) DO UPDATE SET
+                    minutes = minutes + excluded.minutes,
+                    session_count = session_count + excluded.session_count
+            """, day_totals)
+            count = 0
+            subject_totals = {}
+            for _, sid, minutes, n in day_totals:
+                count += n
+                subject_totals[sid] = subject_totals.get(sid, 0) + minutes
+            if not self.total_triggers:
+                cur.executemany(
+                    "UPDATE subjects SET total_done_minutes = total_done_minutes + ? WHERE id=?",
+                    [(minutes, sid) for sid, minutes in subject_totals.items()],
+                )
+        self._invalidate_subjects()
+        self.events.sessions_changed.emit({date for date, _, _, _ in day_totals})
+        return count
+
+    def _drop_session_indexes(self, cur):
+        for name, _ in self.SESSION_INDEXES:
+            cur.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def import_sessions(self, path, subj_id=None):
+        """Bulk-import a session file from iter_session_file; rows without a subject go to subj_id"""
+        def sessions():
+            for subject, minutes, ts in iter_session_file(path):
+                if not subject:
+                    if subj_id is None:
+                        raise ValueError("The file has no subject column; select a subject to import into.")
+                    subject = subj_id
+                yield subject, minutes, ts
+        return self.add_sessions_bulk(sessions())
+
+    def checkpoint_session(self, subj_id, seconds):
+        """Record the running session's unsaved time so it survives a crash"""
+        with self._get_cursor() as cur:
+            cur.execute("""
+                INSERT INTO active_session (id, subject_id, seconds, updated) VALUES (1, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    subject_id = excluded.subject_id,
+                    seconds = excluded.seconds,
+                    updated = excluded.updated
+            """, (subj_id, seconds, datetime.now().isoformat()))
+
+    def get_active_session(self):
+        with self._get_cursor() as cur:
+            cur.execute("SELECT subject_id, seconds, updated FROM active_session WHERE id=1")
+            return cur.fetchone()
+
+    def clear_active_session(self):
         with self._get_cursor() as cur:
-            ts = datetime.now().isoformat()
-            cur.execute("INSERT INTO sessions (subject_id, minutes, ts) VALUES (?, ?, ?)", (subj_id, minutes, ts))
-            cur.execute("UPDATE subjects SET total_done_minutes = total_done_minutes + ? WHERE id=?", (minutes, subj_id))
+            cur.execute("DELETE FROM active_session")
 
     def get_sessions_for_subject(self, subj_id):
         with self._get_cursor() as cur:
-            cur.execute("SELECT minutes, ts FROM sessions WHERE subject_id=? ORDER BY ts", (subj_id,))
+            cur.execute("SELECT minutes, ts FROM sessions WHERE subject_id=? ORDER BY ts_epoch, id", (subj_id,))
             return cur.fetchall()
 
+    def get_recent_sessions_for_subject(self, subj_id, limit):
+        """(session count, last `limit` (minutes, ts) sessions oldest first) for one subject.
+
+        Both come from idx_sessions_subject_ts in one query, without reading the whole history.
+        """
+        with self._get_cursor() as cur:
+            cur.execute("""
+                SELECT (SELECT COUNT(*) FROM sessions WHERE subject_id = ?1), minutes, ts
+                FROM sessions
+                WHERE subject_id = ?1
+                ORDER BY ts_epoch DESC, id DESC
+                LIMIT ?2
+            """, (subj_id, limit))
+            rows = cur.fetchall()
+        count = rows[0][0] if rows else 0
+        return count, [(minutes, ts) for _, minutes, ts in reversed(rows)]
+
     def get_sessions_for_day(self, date_str):
-        start = f"{date_str}T00:00:00"
-        end = f"{date_str}T23:59:59"
+        return self.get_sessions_between(date_str, date_str)
+
+    def get_sessions_between(self, start_date, end_date):
+        """(subject name, minutes, ts) for every session on the days start_date..end_date, oldest first"""
+        start, end = date_range_epoch(start_date, end_date)
         with self._get_cursor() as cur:
             cur.execute("""
                 SELECT subjects.name, sessions.minutes, sessions.ts
                 FROM sessions
                 JOIN subjects ON sessions.subject_id = subjects.id
-                WHERE sessions.ts BETWEEN ? AND ?
-                ORDER BY sessions.ts
+                WHERE sessions.ts_epoch >= ? AND sessions.ts_epoch < ?
+                ORDER BY sessions.ts_epoch, sessions.id
             """, (start, end))
             return cur.fetchall()
 
-    def get_sessions_for_week(self, start_date, end_date):
-        start = f"{start_date}T00:00:00"
-        end = f"{end_date}T23:59:59"
+    def _totals_between(self, start_date, end_date):
         with self._get_cursor() as cur:
             cur.execute("""
-                SELECT subjects.name, SUM(sessions.minutes) as total_minutes
-                FROM sessions
-                JOIN subjects ON sessions.subject_id = subjects.id
-                WHERE sessions.ts BETWEEN ? AND ?
+                SELECT subjects.name, SUM(daily_totals.minutes) as total_minutes
+                FROM daily_totals
+                JOIN subjects ON daily_totals.subject_id = subjects.id
+                WHERE daily_totals.date BETWEEN ? AND ?
                 GROUP BY subjects.name
                 ORDER BY total_minutes DESC
-            """, (start, end))
+            """, (start_date, end_date))
             return cur.fetchall()
 
-    def get_sessions_for_month(self, j_year, j_month):
+    def get_sessions_for_week(self, start_date, end_date):
+        return self._totals_between(start_date, end_date)
+
+    def _j_month_date_range(self, j_year, j_month):
         start_g_y, start_g_m, start_g_d = jalali_to_gregorian(j_year, j_month, 1)
-        days_in_month = 31 if j_month <= 6 else 30 if j_month <= 11 else 30 if is_jalali_leap(j_year) else 29
-        end_g_y, end_g_m, end_g_d = jalali_to_gregorian(j_year, j_month, days_in_month)
-        start = f"{start_g_y}-{start_g_m:02d}-{start_g_d:02d}T00:00:00"
-        end = f"{end_g_y}-{end_g_m:02d}-{end_g_d:02d}T23:59:59"
+        end_g_y, end_g_m, end_g_d = jalali_to_gregorian(j_year, j_month, jalali_month_days(j_year, j_month))
+        return f"{start_g_y}-{start_g_m:02d}-{start_g_d:02d}", f"{end_g_y}-{end_g_m:02d}-{end_g_d:02d}"
+
+    def get_sessions_for_month(self, j_year, j_month):
+        return self._totals_between(*self._j_month_date_range(j_year, j_month))
+
+    def get_study_minutes_for_j_month(self, j_year, j_month):
+        """Map each Jalali day of the month that has sessions to its total minutes"""
+        start, end = self._j_month_date_range(j_year, j_month)
         with self._get_cursor() as cur:
             cur.execute("""
-                SELECT subjects.name, SUM(sessions.minutes) as total_minutes
-                FROM sessions
-                JOIN subjects ON sessions.subject_id = subjects.id
-                WHERE sessions.ts BETWEEN ? AND ?
-                GROUP BY subjects.name
-                ORDER BY total_minutes DESC
-            """, (start, end))
-            return cur.fetchall()
+                SELECT CAST(julianday(date) - julianday(?) AS INTEGER) + 1 AS j_day, SUM(minutes)
+                FROM daily_totals
+                WHERE date BETWEEN ? AND ?
+                GROUP BY j_day
+            """, (start, start, end))
+            return dict(cur.fetchall())
 
     def get_study_days_for_j_month(self, j_year, j_month):
-        study_days = set()
+        return set(self.get_study_minutes_for_j_month(j_year, j_month))
+
+    def get_sessions_for_j_month(self, j_year, j_month):
+        return self.get_sessions_between(*self._j_month_date_range(j_year, j_month))
+
+    def get_daily_totals_between(self, start_date, end_date):
+        """(date, subject name, minutes) for each subject studied on the days start_date..end_date"""
         with self._get_cursor() as cur:
-            cur.execute("SELECT ts FROM sessions")
-            for row in cur.fetchall():
-                ts = row[0]
-                g_date = datetime.fromisoformat(ts).date()
-                jy, jm, jd = gregorian_to_jalali(g_date.year, g_date.month, g_date.day)
-                if jy == j_year and jm == j_month:
-                    study_days.add(jd)
-        return study_days
+            cur.execute("""
+                SELECT daily_totals.date, subjects.name, daily_totals.minutes
+                FROM daily_totals
+                JOIN subjects ON daily_totals.subject_id = subjects.id
+                WHERE daily_totals.date BETWEEN ? AND ?
+                ORDER BY daily_totals.date
+            """, (start_date, end_date))
+            return cur.fetchall()
+
+    def get_daily_totals_for_j_month(self, j_year, j_month):
+        return self.get_daily_totals_between(*self._j_month_date_range(j_year, j_month))
+
+    SESSION_SORT_COLUMNS = ("subjects.name", "sessions.ts_epoch", "sessions.minutes")
+
+    def iter_sessions(self, sort_column=None, descending=False, name_filter="", chunk_size=500):
+        """Yield (subject name, ts, minutes) rows in chunks from one JOINed query; ordering and filtering run in SQL"""
+        if sort_column is None:
+            order = "sessions.subject_id, sessions.ts_epoch, sessions.id"
+        else:
+            direction = "DESC" if descending else "ASC"
+            order = f"{self.SESSION_SORT_COLUMNS[sort_column]} {direction}, sessions.id {direction}"
+        where, params = "", ()
+        if name_filter:
+            escaped = name_filter.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where, params = "WHERE subjects.name LIKE ? ESCAPE '\\'", (f"%{escaped}%",)
+        cur = self._connect().cursor()
+        try:
+            cur.execute(f"""
+                SELECT subjects.name, sessions.ts, sessions.minutes
+                FROM sessions
+                JOIN subjects ON sessions.subject_id = subjects.id
+                {where}
+                ORDER BY {order}
+            """, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cur.close()
+
+    def _export_filter(self, subj_id=None, start_date=None, end_date=None, j_month=None):
+        if j_month is not None:
+            start_date, end_date = self._j_month_date_range(*j_month)
+        clauses, params = [], []
+        if subj_id is not None:
+            clauses.append("sessions.subject_id = ?")
+            params.append(subj_id)
+        if start_date is not None:
+            clauses.append("sessions.ts_epoch >= ? AND sessions.ts_epoch < ?")
+            params.extend(date_range_epoch(start_date, end_date or start_date))
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count_export_sessions(self, **query):
+        where, params = self._export_filter(**query)
+        with self._get_cursor() as cur:
+            cur.execute(f"SELECT COUNT(*) FROM sessions {where}", params)
+            return cur.fetchone()[0]
+
+    def iter_export_sessions(self, chunk_size=5000, **query):
+        """Yield (subject name, minutes, ts) chunks in time order from one cursor.
+
+        query takes subj_id, start_date/end_date ('YYYY-MM-DD', inclusive) or
+        j_month=(year, month); rows come in EXPORT_FIELDS order.
+        """
+        where, params = self._export_filter(**query)
+        cur = self._connect().cursor()
+        try:
+            cur.execute(f"""
+                SELECT subjects.name, sessions.minutes, sessions.ts
+                FROM sessions
+                JOIN subjects ON sessions.subject_id = subjects.id
+                {where}
+                ORDER BY sessions.ts_epoch, sessions.id
+            """, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cur.close()
+
+    def release_thread_connection(self):
+        """Close the calling thread's pooled connection; for threads that are about to finish"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._pool_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
 
     def close(self):
-        pass
+        with self._pool_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+class DBWorker(QThread):
+    """Runs DB calls one at a time on a background thread and hands results back on the GUI thread.
+
+    Requests sharing a key are "latest wins": when a newer one is queued, the
+    older one's callbacks are dropped, so stale results never overwrite fresh ones.
+    """
+    request_finished = pyqtSignal(int, object, object)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._requests = queue.Queue()
+        self._callbacks = {}
+        self._latest = {}
+        self._runs = {}
+        self._next_id = 0
+        self.request_finished.connect(self._deliver)
+        self.start()
+
+    def call(self, fn, *args, on_result=None, on_error=None, key=None):
+        self._next_id += 1
+        request_id = self._next_id
+        if key is not None:
+            self._callbacks.pop(self._latest.get(key), None)
+            self._latest[key] = request_id
+        if not self._callbacks:
+            self.busy_changed.emit(True)
+        self._callbacks[request_id] = (on_result, on_error)
+        run = instrumentation.current_run()
+        if run is not None:
+            instrumentation.hold(run)
+            self._runs[request_id] = run
+        self._requests.put((request_id, fn, args, run))
+        return request_id
+
+    def cancel(self, key):
+        """Drop the callbacks of the request pending under key, e.g. once its answer came from a cache"""
+        if self._callbacks.pop(self._latest.pop(key, None), None) is not None and not self._callbacks:
+            self.busy_changed.emit(False)
+
+    def run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                self.db.release_thread_connection()
+                return
+            request_id, fn, args, run = request
+            try:
+                if run is None:
+                    result = fn(*args)
+                else:
+                    with instrumentation.attached(run):
+                        result = fn(*args)
+            except Exception as e:
+                self.request_finished.emit(request_id, None, e)
+            else:
+                self.request_finished.emit(request_id, result, None)
+
+    def _deliver(self, request_id, result, error):
+        run = self._runs.pop(request_id, None)
+        if run is None:
+            self._dispatch(request_id, result, error)
+            return
+        try:
+            with instrumentation.attached(run):
+                self._dispatch(request_id, result, error)
+        finally:
+            instrumentation.release(run)
+
+    def _dispatch(self, request_id, result, error):
+        on_result, on_error = self._callbacks.pop(request_id, (None, None))
+        if not self._callbacks:
+            self.busy_changed.emit(False)
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                print(f"Background database call failed: {error}", file=sys.stderr)
+        elif on_result is not None:
+            on_result(result)
+
+    def stop(self):
+        self._callbacks.clear()
+        self._requests.put(None)
+        self.wait()
+
+
+class SessionExportWorker(QThread):
+    """Streams an export query into a file chunk by chunk on its own thread.
+
+    The file is written next to the target as '.part' and renamed only when
+    complete, so a cancelled or failed export never leaves a truncated file.
+    """
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(int)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    CHUNK_SIZE = 5000
 
+    def __init__(self, db, path, parent=None, **query):
+        super().__init__(parent)
+        self.db = db
+        self.path = path
+        self.query = query
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        part = self.path + ".part"
+        try:
+            writer_class = SESSION_WRITERS[os.path.splitext(self.path)[1].lower()]
+            total = self.db.count_export_sessions(**self.query)
+            written = 0
+            writer = writer_class(part)
+            try:
+                with closing(self.db.iter_export_sessions(self.CHUNK_SIZE, **self.query)) as chunks:
+                    for rows in chunks:
+                        if self._cancel.is_set():
+                            break
+                        writer.write(rows)
+                        written += len(rows)
+                        self.progress.emit(written, total)
+            finally:
+                writer.close()
+            if self._cancel.is_set():
+                os.remove(part)
+                self.cancelled.emit()
+                return
+            os.replace(part, self.path)
+            self.completed.emit(written)
+        except Exception as e:
+            if os.path.exists(part):
+                os.remove(part)
+            self.failed.emit(str(e))
+        finally:
+            # Each export runs on a new thread; don't leave its connection (and mmap) in the pool
+            self.db.release_thread_connection()
+
+
+class PomodoroTimer:
+    """Countdown that derives elapsed time from a monotonic clock instead of counting ticks.
+
+    Only start/pause timestamps are recorded, so a stalled event loop delays
+    the display but never loses study time. `clock` can be swapped for a fake
+    to drive the timer headlessly.
+    """
+
+    def __init__(self, duration_seconds, clock=time.monotonic):
+        self.clock = clock
+        self.duration = duration_seconds
+        self._banked = 0.0
+        self._started_at = None
+        self._saved = 0.0
+
+    @property
+    def running(self):
+        return self._started_at is not None
+
+    def start(self):
+        if self._started_at is None:
+            self._started_at = self.clock()
+
+    def pause(self):
+        if self._started_at is not None:
+            self._banked = self.elapsed()
+            self._started_at = None
+
+    def reset(self, duration_seconds=None):
+        if duration_seconds is not None:
+            self.duration = duration_seconds
+        self._banked = 0.0
+        self._started_at = None
+        self._saved = 0.0
+
+    def elapsed(self):
+        elapsed = self._banked
+        if self._started_at is not None:
+            elapsed += self.clock() - self._started_at
+        return min(elapsed, self.duration)
+
+    def remaining(self):
+        return self.duration - self.elapsed()
+
+    def finished(self):
+        return self.remaining() <= 0
+
+    def unsaved(self):
+        """Seconds elapsed since the last take_unsaved()"""
+        return self.elapsed() - self._saved
+
+    def restart(self, duration_seconds):
+        """Start a fresh countdown of `duration_seconds`, carrying over time not yet saved"""
+        unsaved = self.unsaved()
+        running = self.running
+        self.reset(duration_seconds)
+        self._saved = -unsaved
+        if running:
+            self.start()
+
+    def take_unsaved(self):
+        """Return the unsaved seconds and mark them saved without touching the countdown"""
+        elapsed = self.elapsed()
+        unsaved, self._saved = elapsed - self._saved, elapsed
+        return unsaved
+
+
+@lru_cache(maxsize=None)
+def load_plotting():
+    """Import matplotlib and NumPy on first use; together they take longer to load than the rest of the app"""
+    import matplotlib
+    matplotlib.use("Qt5Agg")
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+    from matplotlib.figure import Figure
+    import matplotlib.font_manager as fm
+    import numpy as np
+
+    try:
+        font_path = find_resource(CHART_FONT_FILE)
+        if font_path is not None:
+            prop = fm.FontProperties(fname=font_path)
+        else:
+            prop = fm.FontProperties(family="Tahoma")
+    except:
+        prop = fm.FontProperties(family="Tahoma")
+    return np, matplotlib.colormaps, Figure, FigureCanvasQTAgg, prop
+
+
+class PlottingLoader(QThread):
+    """Runs preload_resources and load_plotting off the GUI thread so the main window can paint first"""
+
+    def run(self):
+        preload_resources()
+        try:
+            load_plotting()
+        except Exception:
+            # ProgressChart.load calls it again on the GUI thread and reports the error there
+            pass
+
+
+class ProgressChart(QWidget):
+    """Subject progress chart. Starts out as a placeholder; load() builds the matplotlib
+    canvas, and anything plotted before that is drawn once it exists."""
+    START_ANGLE = 90
+    LABEL_DISTANCE = 1.1
+    PCT_DISTANCE = 0.6
+    BAR_TOP_N = 20
 
-class ProgressChart(FigureCanvas):
     def __init__(self, parent=None, theme=None):
-        fig = Figure(figsize=(6, 5), tight_layout=True)
-        super().__init__(fig)
-        self.axes = fig.add_subplot(111)
-        self.setParent(parent)
+        super().__init__(parent)
         self.theme = theme or {
             'background': '#FFFFFF',
             'text': '#000000',
             'accent': '#0D6EFD',
         }
+        self.canvas = None
+        self.figure = None
+        self.axes = None
+        self._pending = None
+        self._wedges = []
+        self._labels = []
+        self._autotexts = []
+        self._bars = []
+        self._bar_labels = []
+        self._background = None
+        self._label_backgrounds = None
+        self._painted_labels = []
+        self._accent = None
+        self._accent_rgb = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self._placeholder = QLabel("Loading chart...")
+        self._placeholder.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self._placeholder)
+
+    @timed("ProgressChart.load")
+    def load(self):
+        if self.canvas is not None:
+            return
+        try:
+            self._np, self._colormaps, Figure, FigureCanvas, prop = load_plotting()
+        except ImportError as e:
+            self._placeholder.setText(f"Chart unavailable: {e}")
+            return
+        self.figure = Figure(figsize=(6, 5), tight_layout=True)
+        self.canvas = FigureCanvas(self.figure)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.axes = self.figure.add_subplot(111)
         self.axes.set_title("Subject Progress", fontproperties=prop)
         self.update_colors()
+        self.layout().replaceWidget(self._placeholder, self.canvas)
+        self._placeholder.deleteLater()
+        if self._pending:
+            plot, args = self._pending
+            self._pending = None
+            plot(*args)
 
     def update_colors(self):
+        self._background = None  # the saved background has the old colours
         self.axes.set_facecolor(self.theme['background'])
         self.axes.title.set_color(self.theme['text'])
         self.axes.xaxis.label.set_color(self.theme['text'])
@@ -355,40 +1777,435 @@ class ProgressChart(FigureCanvas):
         self.axes.tick_params(axis='y', colors=self.theme['text'])
         self.figure.set_facecolor(self.theme['background'])
 
-    def plot(self, subjects):
+    def set_theme(self, theme):
+        """Recolour whatever is on the axes in place instead of replotting it"""
+        self.theme = theme
+        if self.canvas is None:
+            return
+        self.update_colors()
+        text_color = theme['text']
+        if self._wedges:
+            for wedge, color in zip(self._wedges, self._slice_colors(len(self._wedges))):
+                wedge.set_facecolor(color)
+        elif self._bars:
+            for bar, color in zip(self._bars, self._slice_colors(len(self._bars))[::-1]):
+                bar.set_facecolor(color)
+        for text in self.axes.texts + self.axes.get_yticklabels() + self._labels + self._autotexts:
+            text.set_color(text_color)
+        # Only colours changed, so the last tight layout still holds; skipping
+        # the layout pass takes about a third off the redraw.
+        layout = self.figure.get_layout_engine()
+        self.figure.set_layout_engine('none')
+        try:
+            self.canvas.draw()
+        finally:
+            self.figure.set_layout_engine(layout)
+
+    def _slice_colors(self, count):
+        base_color = self.theme['accent']
+        if '#' not in base_color:
+            return self._colormaps['Pastel1'](self._np.linspace(0, 1, count))
+        if base_color != self._accent:
+            self._accent = base_color
+            self._accent_rgb = tuple(int(base_color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+        r, g, b = self._accent_rgb
+        return [(r, g, b, 0.3 + (0.7 * i / count)) for i in range(count)]
+
+    def show_message(self, text):
+        if self.canvas is None:
+            self._pending = (self.show_message, (text,))
+            return
+        self._wedges, self._labels, self._autotexts = [], [], []
+        self._bars, self._bar_labels = [], []
         self.axes.clear()
+        self._set_frame_animated(False)
         self.update_colors()
+        self.axes.text(0.5, 0.5, text, ha="center", va="center", color=self.theme['text'])
+        self.canvas.draw_idle()
+
+    @timed("ProgressChart.plot")
+    def plot(self, subjects):
+        if self.canvas is None:
+            self._pending = (self.plot, (subjects,))
+            return
         names = [s[1] for s in subjects]
-        names_fingilish = [persian_to_fingilish(name) for name in names]
+        names_fingilish = persian_to_fingilish_batch(names)
         dones = [s[3] for s in subjects]
         targets = [s[2] if s[2] > 0 else 1 for s in subjects]
         percents = [min(100, int(d/t*100)) for d,t in zip(dones, targets)]
+        if not any(percents):
+            self.show_message("No progress yet")
+            return
 
-        colors = []
-        base_color = self.theme['accent']
-        num_colors = len(percents)
-
-        if num_colors > 0:
-            for i in range(num_colors):
-                opacity = 0.3 + (0.7 * i / num_colors)
-                if '#' in base_color:
-                    r = int(base_color[1:3], 16)
-                    g = int(base_color[3:5], 16)
-                    b = int(base_color[5:7], 16)
-                    colors.append((r/255, g/255, b/255, opacity))
-                else:
-                    colors = plt.get_cmap('Pastel1')(np.linspace(0, 1, num_colors))
+        colors = self._slice_colors(len(percents))
+        if len(self._wedges) == len(percents):
+            self._update_pie(percents, names_fingilish, colors)
+        else:
+            self._build_pie(percents, names_fingilish, colors)
+        self.canvas.draw_idle()
 
-        self.axes.pie(
+    def _build_pie(self, percents, labels, colors):
+        self._bars, self._bar_labels = [], []
+        self.axes.clear()
+        self._set_frame_animated(False)
+        self.update_colors()
+        self._wedges, self._labels, self._autotexts = self.axes.pie(
             percents,
-            labels=names_fingilish,
+            labels=labels,
             autopct='%1.1f%%',
-            startangle=90,
+            startangle=self.START_ANGLE,
+            labeldistance=self.LABEL_DISTANCE,
+            pctdistance=self.PCT_DISTANCE,
             colors=colors,
             textprops={'color': self.theme['text']}
         )
         self.axes.axis('equal')
-        self.draw()
+
+    def _update_pie(self, percents, labels, colors):
+        """Move the existing wedges and texts instead of rebuilding the axes"""
+        total = sum(percents)
+        text_color = self.theme['text']
+        theta1 = self.START_ANGLE
+        for wedge, label, autotext, value, name, color in zip(
+                self._wedges, self._labels, self._autotexts, percents, labels, colors):
+            frac = value / total
+            theta2 = theta1 + 360 * frac
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            wedge.set_facecolor(color)
+
+            thetam = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(thetam), math.sin(thetam)
+            label.set_text(name)
+            label.set_position((self.LABEL_DISTANCE * x, self.LABEL_DISTANCE * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            label.set_color(text_color)
+            autotext.set_text('%1.1f%%' % (100 * frac))
+            autotext.set_position((self.PCT_DISTANCE * x, self.PCT_DISTANCE * y))
+            autotext.set_color(text_color)
+            theta1 = theta2
+
+    @timed("ProgressChart.plot_bars")
+    def plot_bars(self, subjects, top_n=None):
+        """Horizontal bar chart of the top_n subjects by minutes done, the rest summed into "Other" """
+        if self.canvas is None:
+            self._pending = (self.plot_bars, (subjects, top_n))
+            return
+        np = self._np
+        top_n = top_n or self.BAR_TOP_N
+        count = len(subjects)
+        dones = np.fromiter((s[3] for s in subjects), dtype=float, count=count)
+        targets = np.fromiter((s[2] if s[2] > 0 else 1 for s in subjects), dtype=float, count=count)
+        order = np.argsort(-dones, kind='stable')
+        shown, rest = order[:top_n], order[top_n:]
+
+        labels = persian_to_fingilish_batch([subjects[i][1] for i in shown])
+        percents = np.minimum(100, dones[shown] / targets[shown] * 100)
+        if rest.size:
+            labels.append(f"Other ({rest.size})")
+            percents = np.append(percents, min(100, dones[rest].sum() / targets[rest].sum() * 100))
+
+        colors = self._slice_colors(len(labels))[::-1]
+        if len(self._bars) == len(labels):
+            for bar, text, width, label, color in zip(self._bars, self._bar_labels, percents, labels, colors):
+                bar.set_width(width)
+                bar.set_facecolor(color)
+                text.set_text(label)
+            # A full draw re-runs the tight layout and renders every axis text;
+            # when every label still fits the laid out margin, repainting just
+            # the bars and their labels over the saved background is enough.
+            # Labels taller than their row can only be redrawn all together.
+            if (self._background is not None and self._labels_fit()
+                    and (self._label_backgrounds is not None or labels == self._painted_labels)):
+                self._blit_bars()
+                return
+        else:
+            self._wedges, self._labels, self._autotexts = [], [], []
+            self.axes.clear()
+            self.update_colors()
+            self.axes.set_aspect('auto')
+            positions = np.arange(len(labels))
+            self._bars = list(self.axes.barh(positions, percents, color=colors, animated=True))
+            self._set_frame_animated(True)
+            # Bar names are annotations rather than tick labels, so that they
+            # are left out of the background like the bars themselves
+            self.axes.set_yticks(positions)
+            self.axes.tick_params(axis='y', labelleft=False)
+            transform = self.axes.get_yaxis_transform()
+            self._bar_labels = [
+                self.axes.annotate(label, (0, position), xycoords=transform, xytext=(-7, 0),
+                                   textcoords='offset points', ha='right', va='center',
+                                   color=self.theme['text'], animated=True)
+                for position, label in zip(positions, labels)
+            ]
+            self.axes.invert_yaxis()
+            self.axes.set_xlim(0, 100)
+            self.axes.set_xlabel("Completed (%)", color=self.theme['text'])
+        self.canvas.draw_idle()
+
+    def _on_draw(self, event):
+        """After a full draw, save what is under the bars and their labels, then paint them"""
+        if not self._bars:
+            self._background = None
+            return
+        # padded so that it also covers the frame, which is drawn over the bars
+        self._background = self.canvas.copy_from_bbox(self.axes.bbox.padded(3))
+        self._label_backgrounds = self._label_strips()
+        self._painted_labels = [None] * len(self._bar_labels)
+        self._draw_bars()
+
+    def _set_frame_animated(self, animated):
+        for spine in self.axes.spines.values():
+            spine.set_animated(animated)
+
+    def _labels_fit(self):
+        """Whether the labels that changed since the last paint stay inside the figure"""
+        left = self.figure.bbox.x0
+        return all(
+            text.get_window_extent().x0 >= left
+            for text, painted in zip(self._bar_labels, self._painted_labels)
+            if text.get_text() != painted
+        )
+
+    def _label_strips(self):
+        """Saved background of each bar's label row, or None when the labels are taller than a row"""
+        edges = self.axes.transData.transform([(0, position - 0.5) for position in range(len(self._bars) + 1)])[:, 1]
+        if abs(edges[1] - edges[0]) < self._bar_labels[0].get_window_extent().height:
+            return None
+        left, right = self.figure.bbox.x0, self.axes.bbox.x0
+        return [
+            self.canvas.copy_from_bbox(self._np.array([[left, min(y0, y1)], [right, max(y0, y1)]]))
+            for y0, y1 in zip(edges, edges[1:])
+        ]
+
+    def _draw_bars(self):
+        # Rendering text is what a bar update costs, so only labels whose text
+        # changed are repainted; the rest are still on the canvas.
+        self.canvas.restore_region(self._background)
+        for bar in self._bars:
+            self.axes.draw_artist(bar)
+        # full bars reach both sides of the frame; keep it on top of them
+        for spine in self.axes.spines.values():
+            self.axes.draw_artist(spine)
+        for i, text in enumerate(self._bar_labels):
+            label = text.get_text()
+            if label == self._painted_labels[i]:
+                continue
+            if self._label_backgrounds is not None:
+                self.canvas.restore_region(self._label_backgrounds[i])
+            self.axes.draw_artist(text)
+            self._painted_labels[i] = label
+
+    def _blit_bars(self):
+        self._draw_bars()
+        self.canvas.blit(self.figure.bbox)
+
+
+class SubjectTableModel(QAbstractTableModel):
+    """Subjects for one of the main window tables, kept in flat arrays ordered by id"""
+    HEADERS = ["ID", "Subject", "Target (m)", "Completed (m)", "Actions"]
+    ID, NAME, TARGET, DONE, ACTIONS = range(5)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ids = array('q')
+        self._targets = array('q')
+        self._dones = array('d')
+        self._names = []
+        self._rows = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if col == self.ID:
+                return str(self._ids[row])
+            if col == self.NAME:
+                return self._names[row]
+            if col == self.TARGET:
+                return f"{self._targets[row]}"
+            if col == self.DONE:
+                return f"{self._dones[row]:.2f}"
+        elif role == Qt.TextAlignmentRole and col != self.ID:
+            return Qt.AlignCenter
+        elif role == Qt.UserRole:
+            return self._ids[row]
+        return None
+
+    def set_subjects(self, subjects):
+        self.beginResetModel()
+        self._ids = array('q', (s[0] for s in subjects))
+        self._names = [s[1] for s in subjects]
+        self._targets = array('q', (int(s[2]) for s in subjects))
+        self._dones = array('d', (s[3] for s in subjects))
+        self._reindex(0)
+        self.endResetModel()
+
+    def _reindex(self, start):
+        if start == 0:
+            self._rows = {}
+        for row in range(start, len(self._ids)):
+            self._rows[self._ids[row]] = row
+
+    def row_of(self, subj_id):
+        return self._rows.get(subj_id)
+
+    def subject_at(self, row):
+        return self._ids[row], self._names[row], self._targets[row], self._dones[row]
+
+    def upsert_subject(self, subject):
+        subj_id, name, target, done = subject
+        row = self._rows.get(subj_id)
+        if row is None:
+            row = bisect_left(self._ids, subj_id)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._ids.insert(row, subj_id)
+            self._names.insert(row, name)
+            self._targets.insert(row, int(target))
+            self._dones.insert(row, done)
+            self._reindex(row)
+            self.endInsertRows()
+        else:
+            self._names[row] = name
+            self._targets[row] = int(target)
+            self._dones[row] = done
+            self.dataChanged.emit(self.index(row, self.NAME), self.index(row, self.DONE))
+
+    def remove_subject(self, subj_id):
+        row = self._rows.pop(subj_id, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._ids[row]
+        del self._names[row]
+        del self._targets[row]
+        del self._dones[row]
+        self._reindex(row)
+        self.endRemoveRows()
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Paints the per-row delete button instead of creating a QPushButton for every row"""
+    deleteRequested = pyqtSignal(int)
+    BUTTON_WIDTH = 85
+    BUTTON_HEIGHT = 30
+    LABEL = "🗑️Delete"
+
+    def __init__(self, theme, parent=None):
+        super().__init__(parent)
+        self.theme = theme
+
+    def _button_rect(self, option):
+        width = min(self.BUTTON_WIDTH, option.rect.width() - 4)
+        height = min(self.BUTTON_HEIGHT, option.rect.height() - 4)
+        return QRect(
+            option.rect.x() + (option.rect.width() - width) // 2,
+            option.rect.y() + (option.rect.height() - height) // 2,
+            width, height
+        )
+
+    def paint(self, painter, option, index):
+        rect = self._button_rect(option)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(self.theme['delete_button']))
+        painter.drawRoundedRect(rect, 8, 8)
+        painter.setPen(QColor(self.theme['delete_button_text']))
+        painter.drawText(rect, Qt.AlignCenter, self.LABEL)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        size.setHeight(max(size.height(), self.BUTTON_HEIGHT + 6))
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and self._button_rect(option).contains(event.pos()):
+            # Deferred so the view finishes handling this click before the row disappears.
+            subj_id = index.data(Qt.UserRole)
+            QTimer.singleShot(0, lambda: self.deleteRequested.emit(subj_id))
+            return True
+        return False
+
+
+class SessionStatisticsModel(QAbstractTableModel):
+    """Every session, fetched from DB.iter_sessions a chunk at a time as the view scrolls"""
+    HEADERS = ["Subject", "Date", "Duration (minutes)"]
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._rows = []
+        self._chunks = None
+        self.sort_column = None
+        self.descending = False
+        self.name_filter = ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        name, ts, minutes = self._rows[index.row()]
+        return (name, ts, str(minutes))[index.column()]
+
+    def reload(self):
+        self.beginResetModel()
+        self.close()
+        self._rows = []
+        self._chunks = self.db.iter_sessions(self.sort_column, self.descending, self.name_filter)
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._chunks is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._chunks is None:
+            return
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._chunks = None
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(chunk) - 1)
+        self._rows.extend(chunk)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column if 0 <= column < len(self.HEADERS) else None
+        self.descending = order == Qt.DescendingOrder
+        self.reload()
+
+    def set_filter(self, text):
+        self.name_filter = text
+        self.reload()
+
+    def close(self):
+        if self._chunks is not None:
+            self._chunks.close()
+            self._chunks = None
 
 
 class StatisticsWindow(QDialog):
@@ -399,13 +2216,27 @@ class StatisticsWindow(QDialog):
         self.setGeometry(100, 100, 600, 400)
         self.setWindowModality(Qt.ApplicationModal)
         self.setWindowIcon(create_app_icon())
+        # a new window is opened each time, so a closed one must not keep its loaded rows around
+        self.setAttribute(Qt.WA_DeleteOnClose)
         self._build_ui()
 
     def _build_ui(self):
         layout = QVBoxLayout()
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["Subject", "Date", "Duration (minutes)"])
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter by subject...")
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self._load_data)
+        self.filter_input.textChanged.connect(self.filter_timer.start)
+        layout.addWidget(self.filter_input)
+
+        self.model = SessionStatisticsModel(self.db, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
         layout.addWidget(self.table)
 
         close_btn = QPushButton("Close")
@@ -415,45 +2246,510 @@ class StatisticsWindow(QDialog):
         self.setLayout(layout)
         self._load_data()
 
+    @timed("StatisticsWindow._load_data")
     def _load_data(self):
-        subjects = self.db.list_subjects()
-        for subject in subjects:
-            sessions = self.db.get_sessions_for_subject(subject[0])
-            for session in sessions:
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-                self.table.setItem(row, 0, QTableWidgetItem(subject[1]))
-                self.table.setItem(row, 1, QTableWidgetItem(session[1]))
-                self.table.setItem(row, 2, QTableWidgetItem(str(session[0])))
+        self.model.set_filter(self.filter_input.text().strip())
+
+    def done(self, result):
+        # Esc rejects the dialog without a close event, so the open cursor (and the WAL
+        # snapshot it pins) is released here, where the Close button and Esc both end up
+        self.model.close()
+        super().done(result)
+
+
+class ExportDialog(QDialog):
+    FORMATS = (
+        ("CSV", ".csv", "CSV Files (*.csv)"),
+        ("JSON Lines", ".jsonl", "JSON Lines Files (*.jsonl)"),
+        ("Parquet (compressed, columnar)", ".parquet", "Parquet Files (*.parquet)"),
+    )
+    PERIODS = ("All time", "Date range", "Jalali month")
+
+    def __init__(self, db, parent=None, subject_id=None):
+        super().__init__(parent)
+        self.db = db
+        self.worker = None
+        self.setWindowTitle("Export Sessions")
+        self.setWindowModality(Qt.ApplicationModal)
+        self.setWindowIcon(create_app_icon())
+        self._build_ui(subject_id)
+
+    def _build_ui(self, subject_id):
+        layout = QVBoxLayout()
+        form = QFormLayout()
+
+        self.subject_combo = QComboBox()
+        self.subject_combo.addItem("All subjects", None)
+        for subj_id, name, _, _ in self.db.list_subjects():
+            self.subject_combo.addItem(name, subj_id)
+        if subject_id is not None:
+            self.subject_combo.setCurrentIndex(max(0, self.subject_combo.findData(subject_id)))
+        form.addRow("Subjects:", self.subject_combo)
+
+        self.period_combo = QComboBox()
+        self.period_combo.addItems(self.PERIODS)
+        self.period_combo.currentIndexChanged.connect(self._update_period_inputs)
+        form.addRow("Period:", self.period_combo)
+
+        today = QDate.currentDate()
+        range_row = QHBoxLayout()
+        self.from_date = QDateEdit(today.addMonths(-1))
+        self.to_date = QDateEdit(today)
+        for edit in (self.from_date, self.to_date):
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("yyyy-MM-dd")
+            range_row.addWidget(edit)
+        form.addRow("From / to:", range_row)
+
+        jy, jm, _ = gregorian_to_jalali(today.year(), today.month(), today.day())
+        month_row = QHBoxLayout()
+        self.j_month_combo = QComboBox()
+        self.j_month_combo.addItems(JALALI_MONTH_NAMES)
+        self.j_month_combo.setCurrentIndex(jm - 1)
+        self.j_year_spin = QSpinBox()
+        self.j_year_spin.setRange(1300, 1500)
+        self.j_year_spin.setValue(jy)
+        month_row.addWidget(self.j_month_combo)
+        month_row.addWidget(self.j_year_spin)
+        form.addRow("Jalali month:", month_row)
+
+        self.format_combo = QComboBox()
+        for label, _, _ in self.FORMATS:
+            self.format_combo.addItem(label)
+        if not parquet_available():
+            item = self.format_combo.model().item(len(self.FORMATS) - 1)
+            item.setEnabled(False)
+            item.setToolTip("Install pyarrow to enable Parquet export.")
+        form.addRow("Format:", self.format_combo)
+        layout.addLayout(form)
+
+        self.progress = QProgressBar()
+        self.progress.setValue(0)
+        layout.addWidget(self.progress)
+
+        buttons = QHBoxLayout()
+        self.btn_export = QPushButton("Export")
+        self.btn_export.clicked.connect(self.start_export)
+        self.btn_cancel = QPushButton("Close")
+        self.btn_cancel.clicked.connect(self.cancel_or_close)
+        buttons.addWidget(self.btn_export)
+        buttons.addWidget(self.btn_cancel)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+        self._update_period_inputs()
+
+    def _update_period_inputs(self):
+        period = self.period_combo.currentIndex()
+        self.from_date.setEnabled(period == 1)
+        self.to_date.setEnabled(period == 1)
+        self.j_month_combo.setEnabled(period == 2)
+        self.j_year_spin.setEnabled(period == 2)
+
+    def query(self):
+        query = {"subj_id": self.subject_combo.currentData()}
+        period = self.period_combo.currentIndex()
+        if period == 1:
+            query["start_date"] = self.from_date.date().toString("yyyy-MM-dd")
+            query["end_date"] = self.to_date.date().toString("yyyy-MM-dd")
+        elif period == 2:
+            query["j_month"] = (self.j_year_spin.value(), self.j_month_combo.currentIndex() + 1)
+        return query
+
+    def start_export(self):
+        _, extension, file_filter = self.FORMATS[self.format_combo.currentIndex()]
+        path, _ = QFileDialog.getSaveFileName(self, "Export Sessions", f"sessions{extension}", file_filter)
+        if not path:
+            return
+        if not path.lower().endswith(extension):
+            path += extension
+        self.worker = SessionExportWorker(self.db, path, self, **self.query())
+        self.worker.progress.connect(self._on_progress)
+        self.worker.completed.connect(self._on_completed)
+        self.worker.cancelled.connect(lambda: self._finish("Export cancelled."))
+        self.worker.failed.connect(self._on_failed)
+        self.progress.setRange(0, 0)
+        self.btn_export.setEnabled(False)
+        self.btn_cancel.setText("Cancel")
+        self.worker.start()
+
+    def cancel_or_close(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+        else:
+            self.close()
+
+    def _on_progress(self, written, total):
+        self.progress.setRange(0, max(total, 1))
+        self.progress.setValue(written)
+
+    def _on_completed(self, count):
+        self.progress.setRange(0, 1)
+        self.progress.setValue(1)
+        self._finish(f"{count} sessions exported.")
+
+    def _on_failed(self, message):
+        self._finish(None)
+        QMessageBox.critical(self, "Error", f"Error exporting: {message}")
+
+    def _finish(self, message):
+        self.worker.wait()
+        self.worker = None
+        self.btn_export.setEnabled(True)
+        self.btn_cancel.setText("Close")
+        if message is None:
+            self.progress.setRange(0, 1)
+            self.progress.setValue(0)
+        else:
+            QMessageBox.information(self, "Export", message)
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
+
+class DiagnosticsDialog(QDialog):
+    """Hidden diagnostics panel (Ctrl+Shift+D): instrumentation timings, per-action query counts and profiling"""
+    ACTION_HEADERS = ["Action", "Count", "Mean ms", "p50 ms", "p95 ms", "Max ms", "Queries", "Queries/action", "Max queries", "Latency"]
+    TIMING_HEADERS = ["Function", "Count", "Mean ms", "p50 ms", "p95 ms", "Max ms", "Latency"]
+    REPEAT_HEADERS = ["Action", "Runs in one action", "Query"]
+    SPARKS = " ▁▂▃▄▅▆▇█"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.setGeometry(120, 120, 900, 600)
+        self.setWindowIcon(create_app_icon())
+        self._build_ui()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(1000)
+        self.refresh()
+
+    def _build_ui(self):
+        layout = QVBoxLayout()
+
+        top = QHBoxLayout()
+        self.chk_enabled = QCheckBox("Record timings and query counts")
+        self.chk_enabled.setChecked(instrumentation.enabled)
+        self.chk_enabled.toggled.connect(instrumentation.set_enabled)
+        top.addWidget(self.chk_enabled)
+        self.lbl_queries = QLabel()
+        top.addWidget(self.lbl_queries)
+        btn_reset = QPushButton("Reset")
+        btn_reset.clicked.connect(self._reset)
+        top.addWidget(btn_reset)
+        layout.addLayout(top)
+
+        layout.addWidget(QLabel("User actions (background database work included):"))
+        self.actions_table = self._make_table(self.ACTION_HEADERS)
+        layout.addWidget(self.actions_table)
+        layout.addWidget(QLabel("Timed calls:"))
+        self.timings_table = self._make_table(self.TIMING_HEADERS)
+        layout.addWidget(self.timings_table)
+        layout.addWidget(QLabel("Repeated reads (same query more than once in one action):"))
+        self.repeats_table = self._make_table(self.REPEAT_HEADERS)
+        layout.addWidget(self.repeats_table)
+
+        profile_row = QHBoxLayout()
+        profile_row.addWidget(QLabel("Profile the next:"))
+        self.action_combo = QComboBox()
+        self.action_combo.setEditable(True)
+        self.action_combo.addItems(sorted(instrumentation.action_names))
+        profile_row.addWidget(self.action_combo, stretch=1)
+        btn_profile = QPushButton("Save cProfile...")
+        btn_profile.clicked.connect(self._arm_profile)
+        profile_row.addWidget(btn_profile)
+        layout.addLayout(profile_row)
+        self.lbl_profile = QLabel()
+        self.lbl_profile.setWordWrap(True)
+        layout.addWidget(self.lbl_profile)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+        self.setLayout(layout)
+
+    @staticmethod
+    def _make_table(headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def _sparkline(self, histogram):
+        peak = max(histogram.buckets) or 1
+        return "".join(self.SPARKS[math.ceil(count / peak * (len(self.SPARKS) - 1))] for count in histogram.buckets)
+
+    def _histogram_tooltip(self, histogram):
+        bounds = [f"<= {bound:g} ms" for bound in histogram.BOUNDS_MS] + [f"> {histogram.BOUNDS_MS[-1]:g} ms"]
+        return "\n".join(f"{bound}: {count}" for bound, count in zip(bounds, histogram.buckets) if count)
+
+    def _fill(self, table, rows):
+        table.setRowCount(len(rows))
+        for r, (histogram, values) in enumerate(rows):
+            for c, value in enumerate(values):
+                item = QTableWidgetItem(value if isinstance(value, str) else f"{value:,.2f}" if isinstance(value, float) else str(value))
+                if c:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(r, c, item)
+            spark = QTableWidgetItem(self._sparkline(histogram))
+            spark.setToolTip(self._histogram_tooltip(histogram))
+            table.setItem(r, len(values), spark)
+        table.resizeColumnsToContents()
+
+    def _stats_values(self, name, histogram):
+        return [name, histogram.count, histogram.mean_ms, histogram.percentile(0.5),
+                histogram.percentile(0.95), histogram.max_ms]
+
+    def refresh(self):
+        with instrumentation._lock:
+            actions = sorted(instrumentation.actions.items(), key=lambda item: -item[1].total_ms)
+            timings = sorted(instrumentation.timings.items(), key=lambda item: -item[1].total_ms)
+            self._fill(self.actions_table, [
+                (stats, self._stats_values(name, stats) + [stats.queries, stats.mean_queries, stats.max_queries])
+                for name, stats in actions
+            ])
+            self._fill(self.timings_table, [
+                (histogram, self._stats_values(name, histogram)) for name, histogram in timings
+            ])
+            repeats = sorted(
+                ((name, n, fp) for name, stats in actions for fp, n in stats.repeated.items()),
+                key=lambda row: -row[1]
+            )
+            queries = instrumentation.queries
+        self.repeats_table.setRowCount(len(repeats))
+        for r, row in enumerate(repeats):
+            for c, value in enumerate(row):
+                item = QTableWidgetItem(str(value))
+                item.setToolTip(str(value))
+                self.repeats_table.setItem(r, c, item)
+        self.lbl_queries.setText(f"{queries} SQL statements")
+        known = {self.action_combo.itemText(i) for i in range(self.action_combo.count())}
+        for name in sorted(instrumentation.action_names - known):
+            self.action_combo.addItem(name)
+        if instrumentation.profile_armed:
+            self.lbl_profile.setText(f"Waiting for the next '{instrumentation.profile_armed}'...")
+        elif instrumentation.last_profile:
+            self.lbl_profile.setText(
+                f"Saved {instrumentation.last_profile} (open with python -m pstats or snakeviz)"
+            )
+
+    def _reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def _arm_profile(self):
+        name = self.action_combo.currentText().strip()
+        if not name:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Profile", "studymaster.prof", "Profile Files (*.prof)")
+        if not path:
+            return
+        instrumentation.profile_next(name, path)
+        self.refresh()
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
+
+
+def sorted_totals(minutes_by_subject):
+    """(name, minutes) pairs, most studied first"""
+    return sorted(minutes_by_subject.items(), key=lambda item: item[1], reverse=True)
+
+
+class CalendarMonth:
+    """One Jalali month of study time, by day and by subject, built from its daily_totals rows.
+
+    The sessions behind a day are only needed for its details, so
+    sessions_by_day holds just the days loaded through CalendarData.day.
+    """
+
+    def __init__(self, jy, jm, totals):
+        self.jy, self.jm = jy, jm
+        g_y, g_m, g_d = jalali_to_gregorian(jy, jm, 1)
+        first = datetime(g_y, g_m, g_d)
+        self.dates = [(first + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(jalali_month_days(jy, jm))]
+        self._days = {date: jd for jd, date in enumerate(self.dates, 1)}
+        self.sessions_by_day = {}
+        self.minutes_by_day = {}
+        self.subject_minutes_by_day = {}
+        self._subject_minutes = {}
+        for date, name, minutes in totals:
+            jd = self._days.get(date)
+            if jd is None:
+                continue
+            self.minutes_by_day[jd] = self.minutes_by_day.get(jd, 0) + minutes
+            day_subjects = self.subject_minutes_by_day.setdefault(jd, {})
+            day_subjects[name] = day_subjects.get(name, 0) + minutes
+            self._subject_minutes[name] = self._subject_minutes.get(name, 0) + minutes
+        self.subject_totals = sorted_totals(self._subject_minutes)
+
+    def date(self, jd):
+        return self.dates[jd - 1]
+
+    def with_session(self, session):
+        """A copy of this month with the (name, minutes, ts) session added; a loaded day keeps the database's ts order"""
+        name, minutes, ts = session
+        jd = self._days.get(ts[:10])
+        if jd is None:
+            return self
+        month = copy.copy(self)
+        month.minutes_by_day = dict(self.minutes_by_day)
+        month.minutes_by_day[jd] = month.minutes_by_day.get(jd, 0) + minutes
+        day_subjects = dict(self.subject_minutes_by_day.get(jd, {}))
+        day_subjects[name] = day_subjects.get(name, 0) + minutes
+        month.subject_minutes_by_day = {**self.subject_minutes_by_day, jd: day_subjects}
+        month._subject_minutes = dict(self._subject_minutes)
+        month._subject_minutes[name] = month._subject_minutes.get(name, 0) + minutes
+        month.subject_totals = sorted_totals(month._subject_minutes)
+        month.sessions_by_day = dict(self.sessions_by_day)
+        if jd in month.sessions_by_day:
+            month.sessions_by_day[jd] = sorted(month.sessions_by_day[jd] + [session], key=lambda s: s[2][:19])
+        return month
+
+
+class CalendarData:
+    """CalendarMonth cache keyed by (jy, jm), least recently used month evicted first.
+
+    Loading a month reads its daily_totals, at most one row per subject and
+    day; the week and month summaries and the day shading are built from
+    those. A day's sessions are read when its details are first shown and
+    kept with the month. A session added through the DB is added to its
+    cached month; months are dropped when sessions change in bulk or are
+    deleted. Used from the GUI thread and a DBWorker at once.
+    """
+    CACHE_MONTHS = 24
+
+    def __init__(self, db, cache_months=CACHE_MONTHS):
+        self.db = db
+        self.cache_months = cache_months
+        self._months = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Direct connections: the cache must be current before the write returns, whichever thread made it
+        db.events.session_added.connect(self.add_session, Qt.DirectConnection)
+        db.events.sessions_changed.connect(self.invalidate, Qt.DirectConnection)
+
+    def close(self):
+        self.db.events.session_added.disconnect(self.add_session)
+        self.db.events.sessions_changed.disconnect(self.invalidate)
+
+    def cached(self, jy, jm):
+        with self._lock:
+            month = self._months.get((jy, jm))
+            if month is not None:
+                self._months.move_to_end((jy, jm))
+            return month
+
+    def month(self, jy, jm):
+        month = self.cached(jy, jm)
+        if month is not None:
+            return month
+        generation = self._generation
+        month = CalendarMonth(jy, jm, self.db.get_daily_totals_for_j_month(jy, jm))
+        with self._lock:
+            # A session added while the query ran may be missing from it, so only keep it if none was
+            if generation == self._generation:
+                self._months[(jy, jm)] = month
+                if len(self._months) > self.cache_months:
+                    self._months.popitem(last=False)
+        return month
+
+    def months(self, keys):
+        return {key: self.month(*key) for key in keys}
+
+    def cached_day(self, jy, jm, jd):
+        """The day's (name, minutes, ts) sessions if they are known without a query, else None"""
+        month = self.cached(jy, jm)
+        if month is None:
+            return None
+        if jd not in month.minutes_by_day:
+            return []
+        return month.sessions_by_day.get(jd)
+
+    def day(self, jy, jm, jd):
+        """The day's (name, minutes, ts) sessions, oldest first"""
+        sessions = self.cached_day(jy, jm, jd)
+        if sessions is not None:
+            return sessions
+        month = self.month(jy, jm)
+        if jd not in month.minutes_by_day:
+            return []
+        generation = self._generation
+        sessions = self.db.get_sessions_for_day(month.date(jd))
+        with self._lock:
+            # Same rule as month(): a session added meanwhile may be missing from the query
+            if generation == self._generation and self._months.get((jy, jm)) is month:
+                month.sessions_by_day[jd] = sessions
+        return sessions
+
+    def add_session(self, subj_id, name, minutes, ts):
+        key = gregorian_to_jalali(*map(int, ts[:10].split("-")))[:2]
+        with self._lock:
+            self._generation += 1
+            month = self._months.get(key)
+            if month is not None:
+                self._months[key] = month.with_session((name, minutes, ts))
+
+    def invalidate(self, dates=None):
+        """Forget the months containing the 'YYYY-MM-DD' dates, or every month when dates is None"""
+        with self._lock:
+            self._generation += 1
+            if dates is None:
+                self._months.clear()
+                return
+            for date in dates:
+                jy, jm, _ = gregorian_to_jalali(*map(int, date.split("-")))
+                self._months.pop((jy, jm), None)
 
 
 class CalendarWindow(QDialog):
-    def __init__(self, db, theme, parent=None):
+    # background reads of this window and its month grid, dropped when it closes on a shared worker
+    REQUEST_KEYS = ("calendar_day", "calendar_week", "calendar_month", "calendar_study_days")
+
+    def __init__(self, db, theme_name, parent=None, worker=None, data=None):
         super().__init__(parent)
         self.db = db
-        self.theme = theme
+        self.theme_name = theme_name
+        self.theme = THEMES[theme_name]
+        self._owns_worker = worker is None
+        self.worker = worker if worker is not None else DBWorker(db, self)
+        self._owns_data = data is None
+        self.data = data if data is not None else CalendarData(db)
         self.setWindowTitle("Monthly Study Calendar")
         self.setGeometry(100, 100, 1000, 700)
         self.setWindowModality(Qt.ApplicationModal)
         self.setWindowIcon(create_app_icon())
+        # a new calendar is opened each time, so a closed one is deleted rather than hidden
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setPalette(theme_palette(theme_name))
         self.setStyleSheet(self.global_styles())
         self._build_ui()
+        # Sessions saved while the calendar is open (the timer can finish one) are redrawn from
+        # CalendarData, which has already applied them; several changes in a row redraw once
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.update_calendar)
+        db.events.session_added.connect(self._sessions_changed)
+        db.events.sessions_changed.connect(self._sessions_changed)
 
     def global_styles(self):
-        return f"""
-        QWidget {{ background-color: {self.theme['background']}; font-family: Tahoma; color: {self.theme['text']}; }}
-        QLabel {{ color: {self.theme['text']}; }}
-        QGroupBox {{ border: 1px solid {self.theme['accent']}; border-radius: 5px; margin-top: 10px; }}
-        QGroupBox::title {{ subcontrol-origin: margin; subcontrol-position: top center; padding: 0 3px; color: {self.theme['accent']}; }}
-        QTextEdit {{ background: {self.theme['table_background']}; color: {self.theme['text']}; border: 1px solid {self.theme['table_header']}; }}
-        QTableWidget {{ background: {self.theme['table_background']}; color: {self.theme['text']}; }}
-        """
+        return calendar_stylesheet(self.theme_name)
+
+    def _sessions_changed(self, *args):
+        self.refresh_timer.start(0)
 
     def _build_ui(self):
         main_layout = QHBoxLayout()
 
         left_layout = QVBoxLayout()
-        self.calendar = CustomJalaliCalendar(self.db, self.theme, self)
+        self.calendar = CustomJalaliCalendar(self.data, self.theme, self, worker=self.worker)
         self.calendar.clicked.connect(self.show_day_details)
         left_layout.addWidget(self.calendar)
         main_layout.addLayout(left_layout, stretch=2)
@@ -490,19 +2786,42 @@ class CalendarWindow(QDialog):
         self.setLayout(main_layout)
         self.update_calendar()
 
+    @timed("CalendarWindow.update_calendar")
     def update_calendar(self):
         self.calendar.update_calendar()
         self.show_month_summary(self.calendar.current_jy, self.calendar.current_jm)
         date = self.calendar.selected_date
         if date:
-            self.show_week_summary(date)
             self.show_day_details(date)
 
+    def _with_months(self, keys, on_result, text_edit, key, on_error=None):
+        """Call on_result with {(jy, jm): CalendarMonth}, right away when every month is cached"""
+        months = {k: self.data.cached(*k) for k in keys}
+        if all(month is not None for month in months.values()):
+            self.worker.cancel(key)
+            on_result(months)
+            return
+        text_edit.setText("Loading...")
+        self.worker.call(self.data.months, keys, on_result=on_result, on_error=on_error, key=key)
+
+    @user_action("Calendar: select day")
     def show_day_details(self, date):
+        self.calendar.selected_date = date
+        jy, jm, jd = gregorian_to_jalali(date.year(), date.month(), date.day())
+        sessions = self.data.cached_day(jy, jm, jd)
+        if sessions is not None:
+            self.worker.cancel("calendar_day")
+            self._render_day_details(date, sessions)
+        else:
+            self.day_details.setText("Loading...")
+            self.worker.call(self.data.day, jy, jm, jd,
+                             on_result=lambda sessions: self._render_day_details(date, sessions), key="calendar_day")
+        self.show_week_summary(date)
+
+    def _render_day_details(self, date, sessions):
         jy, jm, jd = gregorian_to_jalali(date.year(), date.month(), date.day())
         j_date_str = f"{jy}/{jm:02d}/{jd:02d}"
         date_str = date.toString("yyyy-MM-dd")
-        sessions = self.db.get_sessions_for_day(date_str)
         total_seconds = sum(s[1] * 60 for s in sessions)
         total_minutes = int(total_seconds // 60)
         remaining_seconds = int(total_seconds % 60)
@@ -512,15 +2831,26 @@ class CalendarWindow(QDialog):
             secs = int((minutes % 1) * 60)
             details += f"- {name}: {mins} minutes {secs} seconds at {ts[11:16]}\n"
         self.day_details.setText(details)
-        self.show_week_summary(date)
-        self.calendar.selected_date = date
 
     def show_week_summary(self, date):
         weekday = date.dayOfWeek()
         offset = (weekday - 6) % 7
         start_date = date.addDays(-offset)
         end_date = start_date.addDays(6)
-        sessions = self.db.get_sessions_for_week(start_date.toString("yyyy-MM-dd"), end_date.toString("yyyy-MM-dd"))
+        days = [start_date.addDays(i) for i in range(7)]
+        days = [gregorian_to_jalali(day.year(), day.month(), day.day()) for day in days]
+
+        def render(months):
+            minutes_by_subject = {}
+            for jy, jm, jd in days:
+                for name, minutes in months[(jy, jm)].subject_minutes_by_day.get(jd, {}).items():
+                    minutes_by_subject[name] = minutes_by_subject.get(name, 0) + minutes
+            self._render_week_summary(start_date, end_date, sorted_totals(minutes_by_subject))
+
+        keys = tuple(dict.fromkeys((jy, jm) for jy, jm, _ in days))
+        self._with_months(keys, render, self.week_summary, key="calendar_week")
+
+    def _render_week_summary(self, start_date, end_date, sessions):
         total_seconds = sum(s[1] * 60 for s in sessions)
         total_minutes = int(total_seconds // 60)
         remaining_seconds = int(total_seconds % 60)
@@ -541,33 +2871,55 @@ class CalendarWindow(QDialog):
         self.week_summary.setText(summary)
 
     def show_month_summary(self, j_year, j_month):
-        try:
-            sessions = self.db.get_sessions_for_month(j_year, j_month)
-            total_seconds = sum(s[1] * 60 for s in sessions)
-            total_minutes = int(total_seconds // 60)
-            remaining_seconds = int(total_seconds % 60)
-            summary = f"Month: {j_year}/{j_month:02d}\nTotal Study Time: {total_minutes} hours {remaining_seconds} minutes\n\nSubjects:\n"
-            if sessions:
-                most_studied = sessions[0][0]
-                summary += f"Most Studied: {most_studied}\n"
-                for name, minutes in sessions:
-                    mins = int(minutes // 1)
-                    secs = int((minutes % 1) * 60)
-                    summary += f"- {name}: {mins} minutes {secs} seconds\n"
-            else:
-                summary += "No study sessions this month."
-            self.month_summary.setText(summary)
-        except Exception as e:
-            self.month_summary.setText(f"Error loading summary: {str(e)}")
+        self._with_months(
+            ((j_year, j_month),),
+            lambda months: self._render_month_summary(j_year, j_month, months[(j_year, j_month)].subject_totals),
+            self.month_summary, key="calendar_month",
+            on_error=lambda e: self.month_summary.setText(f"Error loading summary: {str(e)}")
+        )
+
+    def _render_month_summary(self, j_year, j_month, sessions):
+        total_seconds = sum(s[1] * 60 for s in sessions)
+        total_minutes = int(total_seconds // 60)
+        remaining_seconds = int(total_seconds % 60)
+        summary = f"Month: {j_year}/{j_month:02d}\nTotal Study Time: {total_minutes} hours {remaining_seconds} minutes\n\nSubjects:\n"
+        if sessions:
+            most_studied = sessions[0][0]
+            summary += f"Most Studied: {most_studied}\n"
+            for name, minutes in sessions:
+                mins = int(minutes // 1)
+                secs = int((minutes % 1) * 60)
+                summary += f"- {name}: {mins} minutes {secs} seconds\n"
+        else:
+            summary += "No study sessions this month."
+        self.month_summary.setText(summary)
+
+    def done(self, result):
+        # Esc rejects the dialog without a close event; done() is where the Close button
+        # and Esc both end up, so a dismissed calendar stops redrawing on every save here
+        self.refresh_timer.stop()
+        self.db.events.session_added.disconnect(self._sessions_changed)
+        self.db.events.sessions_changed.disconnect(self._sessions_changed)
+        if self._owns_worker:
+            self.worker.stop()
+        else:
+            for key in self.REQUEST_KEYS:
+                self.worker.cancel(key)
+        if self._owns_data:
+            self.data.close()
+        super().done(result)
 
 class CustomJalaliCalendar(QWidget):
     clicked = pyqtSignal(QDate)
 
-    def __init__(self, db, theme, parent=None):
+    def __init__(self, data, theme, parent=None, worker=None):
         super().__init__(parent)
-        self.db = db
+        self.data = data
         self.theme = theme
+        self.worker = worker
+        self._day_items = {}
         self.study_days = set()
+        self.study_minutes = {}
         now_g = datetime.now()
         self.current_jy, self.current_jm, self.current_jd = gregorian_to_jalali(now_g.year, now_g.month, now_g.day)
         self.selected_date = QDate(now_g.year, now_g.month, now_g.day)
@@ -597,44 +2949,86 @@ class CustomJalaliCalendar(QWidget):
         self.setLayout(self.layout)
 
     def update_calendar(self):
-        j_month_names = ['Farvardin', 'Ordibehesht', 'Khordad', 'Tir', 'Mordad', 'Shahrivar',
-                        'Mehr', 'Aban', 'Azar', 'Dey', 'Bahman', 'Esfand']
-        self.lbl_month.setText(f"{j_month_names[self.current_jm - 1]} {self.current_jy}")
+        self.lbl_month.setText(f"{JALALI_MONTH_NAMES[self.current_jm - 1]} {self.current_jy}")
 
-        days_in_month = 31 if self.current_jm <= 6 else 30 if self.current_jm <= 11 else 30 if is_jalali_leap(self.current_jy) else 29
+        days_in_month = jalali_month_days(self.current_jy, self.current_jm)
         g_y, g_m, g_d = jalali_to_gregorian(self.current_jy, self.current_jm, 1)
         first_date = QDate(g_y, g_m, g_d)
         weekday = first_date.dayOfWeek()
         col_start = (weekday - 6) % 7
 
         self.table.clearContents()
+        self._day_items = {}
         day = 1
         row = 0
         col = col_start
-        self.study_days = self.db.get_study_days_for_j_month(self.current_jy, self.current_jm)
-
-        accent_color = QColor(self.theme['accent'])
-        bg_color = QColor(self.theme['background'])
-        non_study_color = QColor(
-            min(255, bg_color.red() + 30),
-            min(255, bg_color.green() + 30),
-            min(255, bg_color.blue() + 30)
-        )
+        self.study_minutes = {}
+        self.study_days = set()
+        non_study_color = self._non_study_color()
 
         while day <= days_in_month:
             item = QTableWidgetItem(str(day))
             item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-            if day in self.study_days:
-                item.setBackground(accent_color)
-            else:
-                item.setBackground(non_study_color)
+            item.setBackground(non_study_color)
             self.table.setItem(row, col, item)
+            self._day_items[day] = item
             col += 1
             if col == 7:
                 col = 0
                 row += 1
             day += 1
 
+        jy, jm = self.current_jy, self.current_jm
+        month = self.data.cached(jy, jm)
+        if month is None and self.worker is None:
+            month = self.data.month(jy, jm)
+        if month is not None:
+            if self.worker is not None:
+                self.worker.cancel("calendar_study_days")
+            self._apply_study_minutes(jy, jm, month.minutes_by_day)
+        else:
+            self.worker.call(
+                self.data.month, jy, jm,
+                on_result=lambda month: self._apply_study_minutes(jy, jm, month.minutes_by_day),
+                key="calendar_study_days"
+            )
+
+    def _non_study_color(self):
+        bg_color = QColor(self.theme['background'])
+        return QColor(
+            min(255, bg_color.red() + 30),
+            min(255, bg_color.green() + 30),
+            min(255, bg_color.blue() + 30)
+        )
+
+    def _apply_study_minutes(self, jy, jm, study_minutes):
+        if (jy, jm) != (self.current_jy, self.current_jm):
+            return
+        self.study_minutes = study_minutes
+        self.study_days = set(study_minutes)
+        max_minutes = max(study_minutes.values(), default=0)
+        accent_color = QColor(self.theme['accent'])
+        non_study_color = self._non_study_color()
+        for day, minutes in study_minutes.items():
+            item = self._day_items.get(day)
+            if item is None:
+                continue
+            item.setBackground(self._intensity_color(
+                non_study_color, accent_color, minutes / max_minutes if max_minutes else 1
+            ))
+            item.setToolTip(f"{minutes:.0f} minutes")
+
+    @staticmethod
+    def _intensity_color(low, high, ratio):
+        """Blend from low towards high; even the lightest study day stays clearly tinted"""
+        t = 0.35 + 0.65 * max(0.0, min(1.0, ratio))
+        return QColor(
+            int(low.red() + (high.red() - low.red()) * t),
+            int(low.green() + (high.green() - low.green()) * t),
+            int(low.blue() + (high.blue() - low.blue()) * t),
+        )
+
+    @user_action("Calendar: previous month")
     def prev_month(self):
         try:
             self.current_jm -= 1
@@ -646,11 +3040,11 @@ class CustomJalaliCalendar(QWidget):
                 self.current_jm = 1
                 QMessageBox.warning(self, "Navigation Error", "Cannot navigate before year 1.")
                 return
-            self.update_calendar()
             self.parent().update_calendar()
         except Exception as e:
             QMessageBox.warning(self, "Navigation Error", f"Cannot navigate further back: {str(e)}")
 
+    @user_action("Calendar: next month")
     def next_month(self):
         try:
             self.current_jm += 1
@@ -663,7 +3057,6 @@ class CustomJalaliCalendar(QWidget):
                 self.current_jm = 12
                 QMessageBox.warning(self, "Navigation Error", "Cannot navigate more than 10 years into the future.")
                 return
-            self.update_calendar()
             self.parent().update_calendar()
         except Exception as e:
             QMessageBox.warning(self, "Navigation Error", f"Cannot navigate further forward: {str(e)}")
@@ -680,233 +3073,321 @@ class CustomJalaliCalendar(QWidget):
                 QMessageBox.warning(self, "Date Error", f"Cannot select this date: {str(e)}")
 
 
+THEMES = {
+    'light': {
+        'background': '#F8F9FA',
+        'text': '#212529',
+        'accent': '#0D6EFD',
+        'button': '#E9ECEF',
+        'button_text': '#0D6EFD',
+        'table_background': '#FFFFFF',
+        'table_header': '#E9ECEF',
+        'completed_background': '#E9F7FE',
+        'delete_button': '#FF6B6B',
+        'delete_button_text': '#FFFFFF',
+    },
+    'dark': {
+        'background': '#212529',
+        'text': '#F8F9FA',
+        'accent': '#6C757D',
+        'button': '#343A40',
+        'button_text': '#ADB5BD',
+        'table_background': '#343A40',
+        'table_header': '#495057',
+        'completed_background': '#2D3748',
+        'delete_button': '#5C0000',
+        'delete_button_text': '#FFEBEE',
+    },
+    'dark_green': {
+        'background': '#1A3E2E',
+        'text': '#F8F9FA',
+        'accent': '#28A745',
+        'button': '#2D5A3D',
+        'button_text': '#28A745',
+        'table_background': '#2D5A3D',
+        'table_header': '#346A40',
+        'completed_background': '#1F5D3D',
+        'delete_button': '#8C0000',
+        'delete_button_text': '#FFEBEE',
+    },
+    'light_green': {
+        'background': '#E8F5E9',
+        'text': '#2E7D32',
+        'accent': '#4CAF50',
+        'button': '#C8E6C9',
+        'button_text': '#2E7D32',
+        'table_background': '#E8F5E9',
+        'table_header': '#A5D6A7',
+        'completed_background': '#C8E6C9',
+        'delete_button': '#C62828',
+        'delete_button_text': '#FFFFFF',
+    },
+    'dark_blue': {
+        'background': '#1A2E4A',
+        'text': '#F8F9FA',
+        'accent': '#0D6EFD',
+        'button': '#2A4A6A',
+        'button_text': '#0D6EFD',
+        'table_background': '#2A4A6A',
+        'table_header': '#3A5A7A',
+        'completed_background': '#1E3A5F',
+        'delete_button': '#8C0000',
+        'delete_button_text': '#FFEBEE',
+    },
+    'light_blue': {
+        'background': '#E3F2FD',
+        'text': '#1976D2',
+        'accent': '#2196F3',
+        'button': '#BBDEFB',
+        'button_text': '#1976D2',
+        'table_background': '#E3F2FD',
+        'table_header': '#90CAF9',
+        'completed_background': '#BBDEFB',
+        'delete_button': '#C62828',
+        'delete_button_text': '#FFFFFF',
+    },
+    'dark_purple': {
+        'background': '#2D1B4D',
+        'text': '#F8F9FA',
+        'accent': '#6F42C1',
+        'button': '#3D2B5D',
+        'button_text': '#6F42C1',
+        'table_background': '#3D2B5D',
+        'table_header': '#4D3B6D',
+        'completed_background': '#2D1B4D',
+        'delete_button': '#5C003C',
+        'delete_button_text': '#FCE4EC',
+    },
+    'light_purple': {
+        'background': '#F3E5F5',
+        'text': '#7B1FA2',
+        'accent': '#9C27B0',
+        'button': '#E1BEE7',
+        'button_text': '#7B1FA2',
+        'table_background': '#F3E5F5',
+        'table_header': '#BA68C8',
+        'completed_background': '#E1BEE7',
+        'delete_button': '#C62828',
+        'delete_button_text': '#FFFFFF',
+    },
+    'dark_red': {
+        'background': '#5C0000',
+        'text': '#FFEBEE',
+        'accent': '#FF8A80',
+        'button': '#8C0000',
+        'button_text': '#FFEBEE',
+        'table_background': '#8C0000',
+        'table_header': '#FF8A80',
+        'completed_background': '#7B0000',
+        'delete_button': '#FFCDD2',
+        'delete_button_text': '#C62828',
+    },
+    'light_red': {
+        'background': '#FFEBEE',
+        'text': '#C62828',
+        'accent': '#EF9A9A',
+        'button': '#FFCDD2',
+        'button_text': '#C62828',
+        'table_background': '#FFEBEE',
+        'table_header': '#FF8A80',
+        'completed_background': '#FFCDD2',
+        'delete_button': '#C62828',
+        'delete_button_text': '#FFFFFF',
+    },
+    'dark_pink': {
+        'background': '#4A003C',
+        'text': '#FCE4EC',
+        'accent': '#F06292',
+        'button': '#7B0055',
+        'button_text': '#FCE4EC',
+        'table_background': '#7B0055',
+        'table_header': '#F06292',
+        'completed_background': '#5C003C',
+        'delete_button': '#7B0055',
+        'delete_button_text': '#FCE4EC',
+    },
+    'light_pink': {
+        'background': '#FCE4EC',
+        'text': '#C2185B',
+        'accent': '#F8BBD9',
+        'button': '#F48FB1',
+        'button_text': '#C2185B',
+        'table_background': '#FCE4EC',
+        'table_header': '#F06292',
+        'completed_background': '#F48FB1',
+        'delete_button': '#C62828',
+        'delete_button_text': '#FFFFFF',
+    },
+    'dark_rose': {
+        'background': '#3D004A',
+        'text': '#F3E5F5',
+        'accent': '#BA68C8',
+        'button': '#6A007B',
+        'button_text': '#F3E5F5',
+        'table_background': '#6A007B',
+        'table_header': '#BA68C8',
+        'completed_background': '#5D006A',
+        'delete_button': '#6A007B',
+        'delete_button_text': '#F3E5F5',
+    },
+    'light_rose': {
+        'background': '#F3E5F5',
+        'text': '#7B1FA2',
+        'accent': '#E1BEE7',
+        'button': '#CE93D8',
+        'button_text': '#7B1FA2',
+        'table_background': '#F3E5F5',
+        'table_header': '#BA68C8',
+        'completed_background': '#E1BEE7',
+        'delete_button': '#C62828',
+        'delete_button_text': '#FFFFFF',
+    }
+}
+
+# Theme selector order
+THEME_NAMES = (
+    "light", "dark",
+    "light_green", "dark_green",
+    "light_blue", "dark_blue",
+    "light_purple", "dark_purple",
+    "light_red", "dark_red",
+    "light_pink", "dark_pink",
+    "light_rose", "dark_rose"
+)
+
+
+# Stylesheets and palettes are built once per theme and shared by every window.
+@lru_cache(maxsize=None)
+def main_stylesheet(theme_name):
+    theme = THEMES[theme_name]
+    return f"""
+        QWidget {{ background-color: {theme['background']}; font-family: Tahoma; color: {theme['text']}; }}
+        QLabel#title {{ font-size: 20px; font-weight:700; color:{theme['text']}; }}
+        QPushButton {{ background-color: {theme['button']}; border-radius:10px; padding:8px 12px; color: {theme['button_text']}; }}
+        QPushButton#primary {{ background-color: {theme['accent']}; color:white; border:none; }}
+        QLineEdit {{ border:1px solid #e0e0e0; border-radius:10px; padding:8px; background:{theme['table_background']}; color: {theme['text']}; }}
+        QTableView {{ background:{theme['table_background']}; border:1px solid #e6e6e6; border-radius:8px; color: {theme['text']}; }}
+        QHeaderView::section {{ background:{theme['table_header']}; padding:6px; font-weight:600; color: {theme['text']}; }}
+        QTableView#completedTable {{ background:{theme['completed_background']}; border:1px solid #e6e6e6; border-radius:8px; color: {theme['text']}; }}
+        QScrollArea {{ background: transparent; border: none; }}
+        QFrame#separator {{ margin: 10px 0; background: {theme['accent']}; }}
+        """
+
+
+@lru_cache(maxsize=None)
+def calendar_stylesheet(theme_name):
+    theme = THEMES[theme_name]
+    return f"""
+        QWidget {{ background-color: {theme['background']}; font-family: Tahoma; color: {theme['text']}; }}
+        QLabel {{ color: {theme['text']}; }}
+        QGroupBox {{ border: 1px solid {theme['accent']}; border-radius: 5px; margin-top: 10px; }}
+        QGroupBox::title {{ subcontrol-origin: margin; subcontrol-position: top center; padding: 0 3px; color: {theme['accent']}; }}
+        QTextEdit {{ background: {theme['table_background']}; color: {theme['text']}; border: 1px solid {theme['table_header']}; }}
+        QTableWidget {{ background: {theme['table_background']}; color: {theme['text']}; }}
+        """
+
+
+@lru_cache(maxsize=None)
+def theme_palette(theme_name):
+    """Palette for the parts Qt paints natively (popups, spin boxes, scroll bars, message boxes)"""
+    theme = THEMES[theme_name]
+    palette = QPalette()
+    for role, key in (
+        (QPalette.Window, 'background'),
+        (QPalette.WindowText, 'text'),
+        (QPalette.Base, 'table_background'),
+        (QPalette.AlternateBase, 'completed_background'),
+        (QPalette.Text, 'text'),
+        (QPalette.Button, 'button'),
+        (QPalette.ButtonText, 'button_text'),
+        (QPalette.Highlight, 'accent'),
+    ):
+        palette.setColor(role, QColor(theme[key]))
+    palette.setColor(QPalette.HighlightedText, QColor('#FFFFFF'))
+    return palette
+
+
 class StudyMaster(QWidget):
-    def __init__(self):
+    TICK_SLACK_MS = 5
+    CHECKPOINT_SECONDS = 10
+    DETAIL_SESSIONS = 5
+
+    def __init__(self, db=None, clock=time.monotonic):
         super().__init__()
-        self.db = DB()
+        self.db = db if db is not None else DB()
+        self.db_worker = DBWorker(self.db, self)
+        self.calendar_data = CalendarData(self.db)
         self.setWindowTitle("StudyMaster Pro")
         self.setWindowIcon(create_app_icon())
         self.setMinimumSize(900, 700)
-        self.themes = {
-            'light': {
-                'background': '#F8F9FA',
-                'text': '#212529',
-                'accent': '#0D6EFD',
-                'button': '#E9ECEF',
-                'button_text': '#0D6EFD',
-                'table_background': '#FFFFFF',
-                'table_header': '#E9ECEF',
-                'completed_background': '#E9F7FE',
-                'delete_button': '#FF6B6B',
-                'delete_button_text': '#FFFFFF',
-            },
-            'dark': {
-                'background': '#212529',
-                'text': '#F8F9FA',
-                'accent': '#6C757D',
-                'button': '#343A40',
-                'button_text': '#ADB5BD',
-                'table_background': '#343A40',
-                'table_header': '#495057',
-                'completed_background': '#2D3748',
-                'delete_button': '#5C0000',
-                'delete_button_text': '#FFEBEE',
-            },
-            'dark_green': {
-                'background': '#1A3E2E',
-                'text': '#F8F9FA',
-                'accent': '#28A745',
-                'button': '#2D5A3D',
-                'button_text': '#28A745',
-                'table_background': '#2D5A3D',
-                'table_header': '#346A40',
-                'completed_background': '#1F5D3D',
-                'delete_button': '#8C0000',
-                'delete_button_text': '#FFEBEE',
-            },
-            'light_green': {
-                'background': '#E8F5E9',
-                'text': '#2E7D32',
-                'accent': '#4CAF50',
-                'button': '#C8E6C9',
-                'button_text': '#2E7D32',
-                'table_background': '#E8F5E9',
-                'table_header': '#A5D6A7',
-                'completed_background': '#C8E6C9',
-                'delete_button': '#C62828',
-                'delete_button_text': '#FFFFFF',
-            },
-            'dark_blue': {
-                'background': '#1A2E4A',
-                'text': '#F8F9FA',
-                'accent': '#0D6EFD',
-                'button': '#2A4A6A',
-                'button_text': '#0D6EFD',
-                'table_background': '#2A4A6A',
-                'table_header': '#3A5A7A',
-                'completed_background': '#1E3A5F',
-                'delete_button': '#8C0000',
-                'delete_button_text': '#FFEBEE',
-            },
-            'light_blue': {
-                'background': '#E3F2FD',
-                'text': '#1976D2',
-                'accent': '#2196F3',
-                'button': '#BBDEFB',
-                'button_text': '#1976D2',
-                'table_background': '#E3F2FD',
-                'table_header': '#90CAF9',
-                'completed_background': '#BBDEFB',
-                'delete_button': '#C62828',
-                'delete_button_text': '#FFFFFF',
-            },
-            'dark_purple': {
-                'background': '#2D1B4D',
-                'text': '#F8F9FA',
-                'accent': '#6F42C1',
-                'button': '#3D2B5D',
-                'button_text': '#6F42C1',
-                'table_background': '#3D2B5D',
-                'table_header': '#4D3B6D',
-                'completed_background': '#2D1B4D',
-                'delete_button': '#5C003C',
-                'delete_button_text': '#FCE4EC',
-            },
-            'light_purple': {
-                'background': '#F3E5F5',
-                'text': '#7B1FA2',
-                'accent': '#9C27B0',
-                'button': '#E1BEE7',
-                'button_text': '#7B1FA2',
-                'table_background': '#F3E5F5',
-                'table_header': '#BA68C8',
-                'completed_background': '#E1BEE7',
-                'delete_button': '#C62828',
-                'delete_button_text': '#FFFFFF',
-            },
-            'dark_red': {
-                'background': '#5C0000',
-                'text': '#FFEBEE',
-                'accent': '#FF8A80',
-                'button': '#8C0000',
-                'button_text': '#FFEBEE',
-                'table_background': '#8C0000',
-                'table_header': '#FF8A80',
-                'completed_background': '#7B0000',
-                'delete_button': '#FFCDD2',
-                'delete_button_text': '#C62828',
-            },
-            'light_red': {
-                'background': '#FFEBEE',
-                'text': '#C62828',
-                'accent': '#EF9A9A',
-                'button': '#FFCDD2',
-                'button_text': '#C62828',
-                'table_background': '#FFEBEE',
-                'table_header': '#FF8A80',
-                'completed_background': '#FFCDD2',
-                'delete_button': '#C62828',
-                'delete_button_text': '#FFFFFF',
-            },
-            'dark_pink': {
-                'background': '#4A003C',
-                'text': '#FCE4EC',
-                'accent': '#F06292',
-                'button': '#7B0055',
-                'button_text': '#FCE4EC',
-                'table_background': '#7B0055',
-                'table_header': '#F06292',
-                'completed_background': '#5C003C',
-                'delete_button': '#7B0055',
-                'delete_button_text': '#FCE4EC',
-            },
-            'light_pink': {
-                'background': '#FCE4EC',
-                'text': '#C2185B',
-                'accent': '#F8BBD9',
-                'button': '#F48FB1',
-                'button_text': '#C2185B',
-                'table_background': '#FCE4EC',
-                'table_header': '#F06292',
-                'completed_background': '#F48FB1',
-                'delete_button': '#C62828',
-                'delete_button_text': '#FFFFFF',
-            },
-            'dark_rose': {
-                'background': '#3D004A',
-                'text': '#F3E5F5',
-                'accent': '#BA68C8',
-                'button': '#6A007B',
-                'button_text': '#F3E5F5',
-                'table_background': '#6A007B',
-                'table_header': '#BA68C8',
-                'completed_background': '#5D006A',
-                'delete_button': '#6A007B',
-                'delete_button_text': '#F3E5F5',
-            },
-            'light_rose': {
-                'background': '#F3E5F5',
-                'text': '#7B1FA2',
-                'accent': '#E1BEE7',
-                'button': '#CE93D8',
-                'button_text': '#7B1FA2',
-                'table_background': '#F3E5F5',
-                'table_header': '#BA68C8',
-                'completed_background': '#E1BEE7',
-                'delete_button': '#C62828',
-                'delete_button_text': '#FFFFFF',
-            }
-        }
+        self.themes = THEMES
         self.current_theme = 'light'
+        self.setPalette(theme_palette(self.current_theme))
         self.setStyleSheet(self.global_styles())
-        self.timer = QTimer()
-        self.timer.setInterval(1000)
-        self.timer.timeout.connect(self._tick)
         self.pomodoro_seconds = 25 * 60
-        self.remaining_seconds = 0
-        self.timer_running = False
+        self.pomodoro = PomodoroTimer(self.pomodoro_seconds, clock=clock)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._tick)
+        self._last_checkpoint = 0.0
         self.current_subject_id = None
-        self.session_accumulated_seconds = 0
+        self.pie_max_subjects = 30
+        # subjects_version last shown by the tables and the chart, so unchanged snapshots are skipped
+        self._tables_version = None
+        self._chart_version = None
+        # The selected subject and its session count and last sessions, as the detail pane shows them
+        self._detail_subject = None
+        self._detail_count = 0
+        self._detail_recent = []
         self._build_ui()
+        # Several subject changes in one action redraw the chart once
+        self.chart_timer = QTimer(self)
+        self.chart_timer.setSingleShot(True)
+        self.chart_timer.timeout.connect(self.update_chart)
+        events = self.db.events
+        events.subject_added.connect(self._on_subject_changed)
+        events.subject_updated.connect(self._on_subject_changed)
+        events.subject_removed.connect(self._on_subject_removed)
+        events.session_added.connect(self._on_session_added)
+        events.subjects_reset.connect(self._on_subjects_reset)
+        self._recover_active_session()
         self._load_subjects()
         self.update_chart()
+        self._plotting_loader = PlottingLoader(self)
+        self._plotting_loader.finished.connect(self.chart.load)
+        self._plotting_started = False
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.show_diagnostics)
 
     def global_styles(self):
-        theme = self.themes[self.current_theme]
-        return f"""
-        QWidget {{ background-color: {theme['background']}; font-family: Tahoma; color: {theme['text']}; }}
-        QLabel#title {{ font-size: 20px; font-weight:700; color:{theme['text']}; }}
-        QPushButton {{ background-color: {theme['button']}; border-radius:10px; padding:8px 12px; color: {theme['button_text']}; }}
-        QPushButton#primary {{ background-color: {theme['accent']}; color:white; border:none; }}
-        QLineEdit {{ border:1px solid #e0e0e0; border-radius:10px; padding:8px; background:{theme['table_background']}; color: {theme['text']}; }}
-        QTableWidget {{ background:{theme['table_background']}; border:1px solid #e6e6e6; border-radius:8px; color: {theme['text']}; }}
-        QHeaderView::section {{ background:{theme['table_header']}; padding:6px; font-weight:600; color: {theme['text']}; }}
-        QTableWidget#completedTable {{ background:{theme['completed_background']}; border:1px solid #e6e6e6; border-radius:8px; color: {theme['text']}; }}
-        QPushButton.deleteButton {{ background-color: {theme['delete_button']}; color: {theme['delete_button_text']}; border-radius: 8px; padding: 4px 8px; }}
-        QScrollArea {{ background: transparent; border: none; }}
-        """
+        return main_stylesheet(self.current_theme)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._plotting_started:
+            # Import the plotting libraries once this first paint is done so they don't hold it up
+            self._plotting_started = True
+            QTimer.singleShot(0, self._plotting_loader.start)
 
     def _build_ui(self):
         main_layout = QHBoxLayout()
         left = QVBoxLayout()
         right = QVBoxLayout()
 
+        title_row = QHBoxLayout()
         title = QLabel("StudyMaster Pro")
         title.setObjectName("title")
-        left.addWidget(title)
+        title_row.addWidget(title)
+        self.lbl_loading = QLabel("Loading...")
+        self.lbl_loading.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.lbl_loading.hide()
+        self.db_worker.busy_changed.connect(self.lbl_loading.setVisible)
+        title_row.addWidget(self.lbl_loading)
+        left.addLayout(title_row)
 
         theme_row = QHBoxLayout()
         theme_label = QLabel("Theme:")
         self.theme_selector = QComboBox()
-        self.theme_selector.addItems([
-            "Light", "Dark",
-            "Light Green", "Dark Green",
-            "Light Blue", "Dark Blue",
-            "Light Purple", "Dark Purple",
-            "Light Red", "Dark Red",
-            "Light Pink", "Dark Pink",
-            "Light Rose", "Dark Rose"
-        ])
+        self.theme_selector.addItems([name.replace("_", " ").title() for name in THEME_NAMES])
         self.theme_selector.currentIndexChanged.connect(self.change_theme)
         theme_row.addWidget(theme_label)
         theme_row.addWidget(self.theme_selector)
@@ -926,22 +3407,22 @@ class StudyMaster(QWidget):
         add_row.addWidget(add_btn)
         left.addLayout(add_row)
 
+        self.delete_delegate = DeleteButtonDelegate(self.themes[self.current_theme], self)
+        self.delete_delegate.deleteRequested.connect(self.delete_subject)
+
         active_label = QLabel("Active Subjects")
         active_label.setStyleSheet("font-weight:700; margin-top: 10px;")
         left.addWidget(active_label)
 
-        self.active_table = QTableWidget(0, 5)
+        self.active_model = SubjectTableModel(self)
+        self.active_table = QTableView()
         self.active_table.setObjectName("activeTable")
-        self.active_table.setHorizontalHeaderLabels([
-            "ID",
-            "Subject",
-            "Target (m)",
-            "Completed (m)",
-            "Actions"
-        ])
+        self.active_table.setModel(self.active_model)
+        self.active_table.setItemDelegateForColumn(SubjectTableModel.ACTIONS, self.delete_delegate)
+        self.active_table.verticalHeader().setDefaultSectionSize(DeleteButtonDelegate.BUTTON_HEIGHT + 6)
         self.active_table.setColumnHidden(0, True)
         self.active_table.setSelectionBehavior(self.active_table.SelectRows)
-        self.active_table.cellClicked.connect(lambda r, c: self.on_subject_selected(r, c, self.active_table))
+        self.active_table.clicked.connect(lambda index: self.on_subject_selected(index.row(), index.column(), self.active_table))
 
         self.active_table.setMinimumHeight(200)
         self.active_table.setColumnWidth(1, 200)
@@ -957,7 +3438,7 @@ class StudyMaster(QWidget):
         separator = QFrame()
         separator.setFrameShape(QFrame.HLine)
         separator.setFrameShadow(QFrame.Sunken)
-        separator.setStyleSheet(f"margin: 10px 0; background: {self.themes[self.current_theme]['accent']};")
+        separator.setObjectName("separator")
         left.addWidget(separator)
 
         self.btn_toggle_completed = QPushButton("Show Completed Subjects")
@@ -970,18 +3451,15 @@ class StudyMaster(QWidget):
         self.completed_label.hide()
         left.addWidget(self.completed_label)
 
-        self.completed_table = QTableWidget(0, 5)
+        self.completed_model = SubjectTableModel(self)
+        self.completed_table = QTableView()
         self.completed_table.setObjectName("completedTable")
-        self.completed_table.setHorizontalHeaderLabels([
-            "ID",
-            "Subject",
-            "Target (m)",
-            "Completed (m)",
-            "Actions"
-        ])
+        self.completed_table.setModel(self.completed_model)
+        self.completed_table.setItemDelegateForColumn(SubjectTableModel.ACTIONS, self.delete_delegate)
+        self.completed_table.verticalHeader().setDefaultSectionSize(DeleteButtonDelegate.BUTTON_HEIGHT + 6)
         self.completed_table.setColumnHidden(0, True)
         self.completed_table.setSelectionBehavior(self.completed_table.SelectRows)
-        self.completed_table.cellClicked.connect(lambda r, c: self.on_subject_selected(r, c, self.completed_table))
+        self.completed_table.clicked.connect(lambda index: self.on_subject_selected(index.row(), index.column(), self.completed_table))
 
         self.completed_table.setMinimumHeight(200)
         self.completed_table.setColumnWidth(1, 200)
@@ -1012,27 +3490,27 @@ class StudyMaster(QWidget):
         tbtns = QHBoxLayout()
         self.btn_start = QPushButton("Start")
         self.btn_start.setObjectName("primary")
-        self.btn_start.setIcon(QIcon.fromTheme("media-playback-start"))
+        self.btn_start.setIcon(theme_icon("media-playback-start"))
         self.btn_start.clicked.connect(self.start_pause_timer)
         self.btn_reset = QPushButton("Reset")
-        self.btn_reset.setIcon(QIcon.fromTheme("media-playback-stop"))
+        self.btn_reset.setIcon(theme_icon("media-playback-stop"))
         self.btn_reset.clicked.connect(self.reset_timer)
         tbtns.addWidget(self.btn_start)
         tbtns.addWidget(self.btn_reset)
         timer_box.addLayout(tbtns)
         self.btn_mark_complete = QPushButton("Save Session")
-        self.btn_mark_complete.setIcon(QIcon.fromTheme("document-save"))
+        self.btn_mark_complete.setIcon(theme_icon("document-save"))
         self.btn_mark_complete.clicked.connect(self.mark_session_complete)
         timer_box.addWidget(self.btn_mark_complete)
         left.addLayout(timer_box)
 
         stats_btn = QPushButton("View Statistics")
-        stats_btn.setIcon(QIcon.fromTheme("document-properties"))
+        stats_btn.setIcon(theme_icon("document-properties"))
         stats_btn.clicked.connect(self.view_statistics)
         left.addWidget(stats_btn)
 
         calendar_btn = QPushButton("View Calendar")
-        calendar_btn.setIcon(QIcon.fromTheme("view-calendar"))
+        calendar_btn.setIcon(theme_icon("view-calendar"))
         calendar_btn.clicked.connect(self.view_calendar)
         left.addWidget(calendar_btn)
 
@@ -1048,10 +3526,17 @@ class StudyMaster(QWidget):
         self.lbl_detail.setWordWrap(True)
         self.lbl_detail.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         chart_layout.addWidget(self.lbl_detail)
-        btn_export = QPushButton("Export Sessions to CSV")
-        btn_export.setIcon(QIcon.fromTheme("document-export"))
-        btn_export.clicked.connect(self.export_csv)
-        chart_layout.addWidget(btn_export, alignment=Qt.AlignLeft)
+        btn_export = QPushButton("Export Sessions")
+        btn_export.setIcon(theme_icon("document-export"))
+        btn_export.clicked.connect(self.export_sessions)
+        btn_import = QPushButton("Import Sessions")
+        btn_import.setIcon(theme_icon("document-import"))
+        btn_import.clicked.connect(self.import_sessions)
+        file_buttons = QHBoxLayout()
+        file_buttons.addWidget(btn_export)
+        file_buttons.addWidget(btn_import)
+        file_buttons.addStretch()
+        chart_layout.addLayout(file_buttons)
         chart_container.setLayout(chart_layout)
 
         main_layout.addLayout(left, stretch=3)
@@ -1079,22 +3564,26 @@ class StudyMaster(QWidget):
             self.completed_table.setColumnWidth(1, 200)
         super().resizeEvent(event)
 
+    @user_action("Switch theme")
     def change_theme(self, index):
-        themes = [
-            "light", "dark",
-            "light_green", "dark_green",
-            "light_blue", "dark_blue",
-            "light_purple", "dark_purple",
-            "light_red", "dark_red",
-            "light_pink", "dark_pink",
-            "light_rose", "dark_rose"
-        ]
-        self.current_theme = themes[index]
-        self.setStyleSheet(self.global_styles())
-        self.chart.theme = self.themes[self.current_theme]
-        self.chart.update_colors()
-        self.update_chart()
+        theme_name = THEME_NAMES[index]
+        if theme_name == self.current_theme:
+            return
+        self.current_theme = theme_name
+        theme = self.themes[theme_name]
+        # Qt resolves stylesheet colours when it polishes a widget, so the cached
+        # sheet still has to be applied once; holding repaints avoids drawing every
+        # intermediate state while the children are re-polished.
+        self.setUpdatesEnabled(False)
+        try:
+            self.setPalette(theme_palette(theme_name))
+            self.setStyleSheet(self.global_styles())
+        finally:
+            self.setUpdatesEnabled(True)
+        self.delete_delegate.theme = theme
+        self.chart.set_theme(theme)
 
+    @user_action("Add subject")
     def add_subject_clicked(self):
         name = self.input_subject.text().strip()
         target = int(self.input_target.value())
@@ -1103,210 +3592,381 @@ class StudyMaster(QWidget):
             return
         self.db.add_subject(name, target)
         self.input_subject.clear()
-        self._load_subjects()
-        self.update_chart()
-
-    def _load_subjects(self):
-        self.subjects = self.db.list_subjects()
-        self.active_table.setRowCount(0)
-        self.completed_table.setRowCount(0)
-
-        for row_idx, s in enumerate(self.subjects):
-            subj_id, name, target, done = s
-            table = self.completed_table if target > 0 and done >= target else self.active_table
-
-            row = table.rowCount()
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(subj_id)))
 
-            subject_item = QTableWidgetItem(name)
-            subject_item.setTextAlignment(Qt.AlignCenter)
-            table.setItem(row, 1, subject_item)
+    def _subject_model_for(self, subject):
+        _, _, target, done = subject
+        return self.completed_model if target > 0 and done >= target else self.active_model
 
-            target_item = QTableWidgetItem(f"{target}")
-            target_item.setTextAlignment(Qt.AlignCenter)
-            table.setItem(row, 2, target_item)
-
-            completed_item = QTableWidgetItem(f"{done:.2f}")
-            completed_item.setTextAlignment(Qt.AlignCenter)
-            table.setItem(row, 3, completed_item)
-
-            delete_btn = QPushButton("🗑️Delete")
-            delete_btn.setObjectName("deleteButton")
-            delete_btn.setFixedSize(85, 35)
-            delete_btn.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-            delete_btn.clicked.connect(lambda _, sid=subj_id: self.delete_subject(sid))
-            table.setCellWidget(row, 4, delete_btn)
+    @timed("StudyMaster._load_subjects")
+    def _load_subjects(self):
+        snapshot = self.db.cached_subjects()
+        if snapshot is not None:
+            self.db_worker.cancel("subjects")
+            self._apply_subjects(snapshot)
+        else:
+            self.db_worker.call(self.db.subjects_snapshot, on_result=self._apply_subjects, key="subjects")
 
+    @timed("StudyMaster._apply_subjects")
+    def _apply_subjects(self, snapshot):
+        version, subjects = snapshot
+        if version < self.db.subjects_version:
+            # Read before a write whose delta may already be in the tables; read again
+            self._load_subjects()
+            return
+        if version == self._tables_version:
+            return
+        self._tables_version = version
+        active, completed = [], []
+        for s in subjects:
+            (completed if self._subject_model_for(s) is self.completed_model else active).append(s)
+        self.active_model.set_subjects(active)
+        self.completed_model.set_subjects(completed)
+
+    def _on_subject_changed(self, subject):
+        self._apply_subject(subject[0], subject)
+        if subject[0] == self.current_subject_id:
+            self._detail_subject = subject
+            self._render_detail()
+        self.chart_timer.start(0)
+
+    def _on_subject_removed(self, subj_id):
+        self._apply_subject(subj_id, None)
+        if subj_id == self.current_subject_id:
+            self._clear_detail()
+        self.chart_timer.start(0)
+
+    def _on_session_added(self, subj_id, name, minutes, ts):
+        if subj_id == self.current_subject_id:
+            self._detail_count += 1
+            self._detail_recent = (self._detail_recent + [(minutes, ts)])[-self.DETAIL_SESSIONS:]
+            self._render_detail()
+
+    def _on_subjects_reset(self):
+        self._load_subjects()
+        self.chart_timer.start(0)
+        subj_id = self.current_subject_id
+        if subj_id is not None:
+            self.db_worker.call(
+                lambda: (self.db.get_subject(subj_id), *self._detail_sessions(subj_id)),
+                on_result=lambda result: self._reload_detail(subj_id, *result), key="detail"
+            )
+
+    def _detail_sessions(self, subj_id):
+        return self.db.get_recent_sessions_for_subject(subj_id, self.DETAIL_SESSIONS)
+
+    def _reload_detail(self, subj_id, subject, count, recent):
+        if subj_id != self.current_subject_id:
+            return
+        if subject is None:
+            self._clear_detail()
+        else:
+            self._show_detail(subject, count, recent)
+
+    def _apply_subject(self, subj_id, subject):
+        target_model = self._subject_model_for(subject) if subject else None
+        for model in (self.active_model, self.completed_model):
+            if model is not target_model:
+                model.remove_subject(subj_id)
+        if target_model is not None:
+            target_model.upsert_subject(subject)
+
+    def _find_subject_row(self, subj_id):
+        for table, model in ((self.active_table, self.active_model), (self.completed_table, self.completed_model)):
+            row = model.row_of(subj_id)
+            if row is not None:
+                return table, row
+        return None, None
+
+    @user_action("Select subject")
     def on_subject_selected(self, r, c, table):
         if c == 4:
             return
 
-        subj_id = int(table.item(r, 0).text())
-        name = table.item(r, 1).text()
-        target = int(float(table.item(r, 2).text()))
-        done = float(table.item(r, 3).text())
+        subject = table.model().subject_at(r)
+        subj_id = self.current_subject_id = subject[0]
+        # The pane is filled once the sessions arrive: rendering it twice would resize the
+        # chart below it twice, and each resize redraws the whole figure
+        self._detail_subject = subject
+        self.db_worker.call(
+            self._detail_sessions, subj_id,
+            on_result=lambda result: self._reload_detail(subj_id, self._detail_subject, *result), key="detail"
+        )
+
+    def _show_detail(self, subject, count, recent):
+        """Fill the detail pane from the subject, its session count and its last (minutes, ts) sessions, oldest first"""
+        self._detail_subject = subject
+        self._detail_count = count
+        self._detail_recent = list(recent)
+        self._render_detail()
 
-        self.current_subject_id = subj_id
+    def _clear_detail(self):
+        self.current_subject_id = None
+        self._detail_subject = None
+        self._detail_count = 0
+        self._detail_recent = []
+        self.lbl_detail.setText("No subject selected")
+
+    def _render_detail(self):
+        _, name, target, done = self._detail_subject
         text = f"Subject: {name}\nTarget: {target} minutes\nCompleted: {done:.2f} minutes"
-        sessions = self.db.get_sessions_for_subject(subj_id)
-        if sessions:
-            text += f"\n\nLast sessions ({len(sessions)}):"
-            for m, ts in sessions[-5:]:
+        if self._detail_count:
+            text += f"\n\nLast sessions ({self._detail_count}):"
+            for m, ts in self._detail_recent:
                 mins = int(m // 1)
                 secs = int((m % 1) * 60)
                 text += f"\n- {mins} minutes {secs} seconds on {ts[:16]}"
         self.lbl_detail.setText(text)
 
     def delete_subject(self, subj_id):
-        name = None
-        for r in range(self.active_table.rowCount()):
-            if int(self.active_table.item(r, 0).text()) == subj_id:
-                name = self.active_table.item(r, 1).text()
-                break
-        for r in range(self.completed_table.rowCount()):
-            if int(self.completed_table.item(r, 0).text()) == subj_id:
-                name = self.completed_table.item(r, 1).text()
-                break
-
-        if name is None:
+        table, row = self._find_subject_row(subj_id)
+        if table is None:
             QMessageBox.warning(self, "Error", "Subject not found.")
             return
+        name = table.model().subject_at(row)[1]
 
         ok = QMessageBox.question(self, "Delete", f"Are you sure you want to delete the subject '{name}' and all its sessions?")
         if ok == QMessageBox.Yes:
-            self.db.delete_subject(subj_id)
-            self._load_subjects()
-            self.update_chart()
-            self.lbl_detail.setText("No subject selected")
-            self.current_subject_id = None
+            # subject_removed clears the detail pane if this was the selected subject
+            with instrumentation.action("Delete subject"):
+                self.db.delete_subject(subj_id)
             QMessageBox.information(self, "Deleted", f"Subject '{name}' has been deleted.")
 
+    @property
+    def timer_running(self):
+        return self.pomodoro.running
+
+    @property
+    def remaining_seconds(self):
+        return math.ceil(self.pomodoro.remaining())
+
+    @property
+    def session_accumulated_seconds(self):
+        return self.pomodoro.unsaved()
+
     def set_duration(self, minutes):
         self.pomodoro_seconds = minutes * 60
-        self.remaining_seconds = self.pomodoro_seconds
-        self.lbl_timer.setText(self._format_time(self.remaining_seconds))
+        self.pomodoro.restart(self.pomodoro_seconds)
+        self._show_remaining()
+        if self.pomodoro.running:
+            self._schedule_tick()
 
+    @user_action("Start/pause timer")
     def start_pause_timer(self):
-        if not self.timer_running:
+        if not self.pomodoro.running:
             if self.current_subject_id is None:
                 QMessageBox.information(self, "Select Subject", "Please select a subject from the list first.")
                 return
-            if self.remaining_seconds <= 0:
-                self.remaining_seconds = self.pomodoro_seconds
-                self.session_accumulated_seconds = 0
-            self.timer.start()
-            self.timer_running = True
+            if self.pomodoro.finished():
+                self.pomodoro.reset(self.pomodoro_seconds)
+            self.pomodoro.start()
+            self._last_checkpoint = self.pomodoro.clock()
+            self._schedule_tick()
             self.btn_start.setText("Pause")
         else:
+            self.pomodoro.pause()
             self.timer.stop()
-            self.timer_running = False
+            self._checkpoint(force=True)
+            self._show_remaining()
             self.btn_start.setText("Start")
 
+    @user_action("Reset timer")
     def reset_timer(self):
         self.timer.stop()
-        self.timer_running = False
-        self.remaining_seconds = self.pomodoro_seconds
-        self.session_accumulated_seconds = 0
-        self.lbl_timer.setText(self._format_time(self.remaining_seconds))
+        self.pomodoro.reset(self.pomodoro_seconds)
+        self.db.clear_active_session()
+        self._show_remaining()
         self.btn_start.setText("Start")
 
+    def _show_remaining(self):
+        self.lbl_timer.setText(self._format_time(self.remaining_seconds))
+
+    def _schedule_tick(self):
+        """Wake just after the displayed second changes, or only to checkpoint and finish while minimized"""
+        remaining = self.pomodoro.remaining()
+        if not self.isMinimized():
+            remaining = remaining % 1 or 1
+        remaining = min(remaining, self.CHECKPOINT_SECONDS)
+        self.timer.start(int(remaining * 1000) + self.TICK_SLACK_MS)
+
     def _tick(self):
-        if self.remaining_seconds > 0:
-            self.remaining_seconds -= 1
-            self.session_accumulated_seconds += 1
-            self.lbl_timer.setText(self._format_time(self.remaining_seconds))
-        else:
-            self.timer.stop()
-            self.timer_running = False
-            self.btn_start.setText("Start")
-            minutes = self.session_accumulated_seconds / 60
-            if minutes <= 0:
-                minutes = 0
-            self._register_session(minutes)
+        if not self.pomodoro.running:
+            return
+        if not self.pomodoro.finished():
+            self._show_remaining()
+            self._checkpoint()
+            self._schedule_tick()
+            return
+        self.pomodoro.pause()
+        self.btn_start.setText("Start")
+        minutes = self.pomodoro.take_unsaved() / 60
+        if self._register_session(minutes):
             QMessageBox.information(self, "Time's Up", "⏰ Session time is up. Session saved.")
-            self.remaining_seconds = self.pomodoro_seconds
-            self.session_accumulated_seconds = 0
-            self.lbl_timer.setText(self._format_time(self.remaining_seconds))
+        else:
+            QMessageBox.warning(self, "Time's Up", "⏰ Session time is up, but its subject was deleted, so it was not saved.")
+        self.pomodoro.reset(self.pomodoro_seconds)
+        self._show_remaining()
+
+    def _checkpoint(self, force=False):
+        """Journal the unsaved seconds at most every CHECKPOINT_SECONDS with one small UPSERT"""
+        now = self.pomodoro.clock()
+        if not force and now - self._last_checkpoint < self.CHECKPOINT_SECONDS:
+            return
+        self._last_checkpoint = now
+        seconds = self.pomodoro.unsaved()
+        if self.current_subject_id is not None and seconds > 0:
+            self.db.checkpoint_session(self.current_subject_id, seconds)
+        else:
+            # nothing to recover, so an older checkpoint must not be offered on the next start
+            self.db.clear_active_session()
+
+    def _recover_active_session(self):
+        active = self.db.get_active_session()
+        if active is None:
+            return
+        subj_id, seconds, updated = active
+        subject = self.db.get_subject(subj_id)
+        if subject is None or seconds < 1:
+            self.db.clear_active_session()
+            return
+        ok = QMessageBox.question(
+            self, "Recover Session",
+            f"An unfinished session of {self._format_time(round(seconds))} for '{subject[1]}' was found.\n"
+            "Do you want to save it?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if ok == QMessageBox.Yes:
+            self.db.add_session(subj_id, seconds / 60, ts=datetime.fromisoformat(updated))
+        else:
+            self.db.clear_active_session()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange and self.pomodoro.running:
+            self._show_remaining()
+            self._schedule_tick()
+        super().changeEvent(event)
 
     def mark_session_complete(self):
         if self.current_subject_id is None:
             QMessageBox.information(self, "Selection", "Please select a subject.")
             return
-        minutes = self.session_accumulated_seconds / 60
-        if minutes <= 0:
+        seconds = self.pomodoro.unsaved()
+        if seconds <= 0:
             QMessageBox.information(self, "No Time", "No study time has been accumulated yet.")
             return
-        self._register_session(minutes)
-        QMessageBox.information(self, "Saved", f"{self.session_accumulated_seconds} seconds saved for the subject.")
-        self.session_accumulated_seconds = 0
+        self.pomodoro.take_unsaved()
+        self._register_session(seconds / 60)
+        QMessageBox.information(self, "Saved", f"{round(seconds)} seconds saved for the subject.")
 
+    @user_action("Save session")
     def _register_session(self, minutes):
+        """Save minutes for the selected subject; False when there is none (it was deleted meanwhile)"""
+        if self.current_subject_id is None:
+            return False
+        # The row, detail pane, chart and calendar follow from the DB's change events
         self.db.add_session(self.current_subject_id, minutes)
-        self._load_subjects()
-        self.update_chart()
-
-        rows = self.active_table.rowCount()
-        found = False
-        for r in range(rows):
-            if int(self.active_table.item(r, 0).text()) == self.current_subject_id:
-                self.on_subject_selected(r, 0, self.active_table)
-                found = True
-                break
-
-        if not found:
-            rows = self.completed_table.rowCount()
-            for r in range(rows):
-                if int(self.completed_table.item(r, 0).text()) == self.current_subject_id:
-                    self.on_subject_selected(r, 0, self.completed_table)
-                    break
+        return True
 
     def update_chart(self):
-        subjects = self.db.list_subjects()
-        if subjects:
-            self.chart.plot(subjects)
+        snapshot = self.db.cached_subjects()
+        if snapshot is not None:
+            self.db_worker.cancel("chart")
+            self._plot_subjects(snapshot)
         else:
-            self.chart.axes.clear()
-            self.chart.update_colors()
-            self.chart.axes.text(0.5, 0.5, "No subjects added", ha="center", va="center", color=self.themes[self.current_theme]['text'])
-            self.chart.draw()
+            self.db_worker.call(self.db.subjects_snapshot, on_result=self._plot_subjects, key="chart")
 
-    def export_csv(self):
-        if self.current_subject_id is None:
-            QMessageBox.information(self, "Selection", "Please select a subject.")
+    def _plot_subjects(self, snapshot):
+        version, subjects = snapshot
+        if version < self.db.subjects_version:
+            self.update_chart()
             return
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
+        if version == self._chart_version:
+            return
+        self._chart_version = version
+        if len(subjects) > self.pie_max_subjects:
+            self.chart.plot_bars(subjects)
+        elif subjects:
+            self.chart.plot(subjects)
+        else:
+            self.chart.show_message("No subjects added")
+
+    def export_sessions(self):
+        self.export_dialog = ExportDialog(self.db, self, subject_id=self.current_subject_id)
+        self.export_dialog.show()
+
+    def import_sessions(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Sessions", "", "Session Files (*.csv *.jsonl *.parquet);;All Files (*)"
+        )
         if not path:
             return
-        sessions = self.db.get_sessions_for_subject(self.current_subject_id)
-        try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write("minutes,ts\n")
-                for m, ts in sessions:
-                    f.write(f"{m},{ts}\n")
-            QMessageBox.information(self, "Export", "CSV file saved successfully.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error saving: {e}")
+        with instrumentation.action("Import sessions"):
+            self.db_worker.call(
+                self.db.import_sessions, path, self.current_subject_id,
+                on_result=self._sessions_imported,
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Error importing: {e}")
+            )
+
+    def _sessions_imported(self, count):
+        # The tables and chart reload on the DB's subjects_reset event
+        QMessageBox.information(self, "Import", f"{count} sessions imported.")
 
     def view_statistics(self):
         self.stats_window = StatisticsWindow(self.db, self)
         self.stats_window.show()
 
     def view_calendar(self):
-        self.calendar_window = CalendarWindow(self.db, self.themes[self.current_theme], self)
+        self.calendar_window = CalendarWindow(
+            self.db, self.current_theme, self, worker=self.db_worker, data=self.calendar_data
+        )
         self.calendar_window.show()
 
+    def show_diagnostics(self):
+        self.diagnostics_dialog = DiagnosticsDialog(self)
+        self.diagnostics_dialog.show()
+
     def _format_time(self, seconds):
         m = seconds // 60
         s = seconds % 60
         return f"{m:02d}:{s:02d}"
 
     def closeEvent(self, event):
+        self.timer.stop()
+        self._checkpoint(force=True)
+        self._plotting_loader.wait()
+        self.db_worker.stop()
+        self.calendar_data.close()
         self.db.close()
         event.accept()
 
 
 if __name__ == "__main__":
+    if "--rebuild-daily-totals" in sys.argv:
+        db = DB()
+        db.rebuild_daily_totals()
+        db.close()
+        print("daily_totals rebuilt.")
+        sys.exit(0)
+
+    if "--reconcile-totals" in sys.argv:
+        db = DB()
+        repaired = db.reconcile_totals()
+        db.close()
+        for subj_id, name, stored, actual in repaired:
+            print(f"{name} (#{subj_id}): {stored} -> {actual}")
+        print(f"{len(repaired)} subject totals repaired.")
+        sys.exit(0)
+
+    if "--total-triggers=on" in sys.argv or "--total-triggers=off" in sys.argv:
+        db = DB()
+        db.set_total_triggers("--total-triggers=on" in sys.argv)
+        db.close()
+        print(f"Trigger-maintained subject totals {'enabled' if db.total_triggers else 'disabled'}.")
+        sys.exit(0)
+
+    if "--profile" in sys.argv or os.environ.get("STUDYMASTER_PROFILE"):
+        # Record timings and query counts from the start; Ctrl+Shift+D shows them
+        instrumentation.set_enabled(True)
+
     app = QApplication(sys.argv)
     
 